@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class GestorTareasConfig(AppConfig):
+    name = 'gestor_tareas'
+
+    def ready(self):
+        # Registers the query timer before any database connection is opened.
+        from . import timing  # noqa: F401
@@ -0,0 +1,87 @@
+"""
+Helpers shared by the ``benchmark*`` management commands: seeding a throwaway
+user, driving the API in-process, running requests on a thread pool and
+summarizing their latencies.
+"""
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from users.models import Usuario
+
+
+def percentile(latencies, fraction):
+    return round(latencies[max(int(len(latencies) * fraction) - 1, 0)] * 1000, 2)
+
+
+def summarize(latencies, elapsed):
+    """
+    Return the request count, throughput (requests per second) and p50/p95/p99
+    latency in milliseconds of ``latencies`` (seconds) run in ``elapsed``.
+    """
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+def run_concurrently(func, items, concurrency):
+    """
+    Call ``func`` for every item on ``concurrency`` threads and return the
+    results with the elapsed seconds.
+    """
+    started = time.perf_counter()
+    if concurrency == 1:
+        results = [func(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(func, items))
+    return results, time.perf_counter() - started
+
+
+def require_shared_database():
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        raise CommandError('An in-memory SQLite database cannot be shared across threads; use Postgres.')
+
+
+def unique_name(kind):
+    return f'bench-{kind}-{uuid.uuid4().hex[:8]}'
+
+
+@contextmanager
+def seeded_user(kind, password=None):
+    """
+    Create a user named after ``kind`` and delete it, with its tareas, on exit.
+    """
+    username = unique_name(kind)
+    user = Usuario.objects.create_user(username=username, email=f'{username}@example.com', password=password)
+    try:
+        yield user
+    finally:
+        user.delete()
+
+
+def unthrottled(**overrides):
+    """
+    Override the settings that get in the way of driving the API in-process:
+    the test client's host is allowed and throttling is off, since a benchmark
+    sends far more requests than any rate allows.
+    """
+    rest_framework = settings.REST_FRAMEWORK
+    rates = {scope: None for scope in rest_framework.get('DEFAULT_THROTTLE_RATES', {})}
+    return override_settings(
+        ALLOWED_HOSTS=['*'],
+        REST_FRAMEWORK={**rest_framework, 'DEFAULT_THROTTLE_RATES': rates},
+        **overrides
+    )
@@ -0,0 +1,39 @@
+"""
+Helpers for the database connection pool configured in ``DATABASES``.
+
+With ``DB_POOL`` enabled, Django 5.1 keeps a psycopg 3 ``ConnectionPool`` per
+alias and process, and requests borrow connections from it instead of opening
+their own.
+"""
+from django.db import connections
+
+
+def get_pool_stats(alias='default'):
+    """
+    Return the pool counters of ``alias`` for this process, or ``None`` when
+    the alias is not pooled.
+
+    ``checkouts`` counts connection requests, ``waits`` those that had to
+    queue for a free connection and ``wait_ms`` the total time spent queued.
+    """
+    connection = connections[alias]
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    return {
+        'min_size': stats.get('pool_min', pool.min_size),
+        'max_size': stats.get('pool_max', pool.max_size),
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': stats.get('requests_num', 0),
+        'waits': stats.get('requests_queued', 0),
+        'wait_ms': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connections_failed': stats.get('connections_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'bad_returns': stats.get('returns_bad', 0),
+    }
@@ -0,0 +1,294 @@
+import json
+import random
+import re
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from gestor_tareas.benchmarking import require_shared_database, run_concurrently, summarize, unthrottled
+from tarea.models import Tarea
+from users.cookies import ACCESS_COOKIE, REFRESH_COOKIE
+from users.models import Usuario
+
+PASSWORD = 'benchmark-password'
+
+# Run in this order: the deletes come last so the other endpoints never pick
+# a tarea that is already gone.
+ENDPOINTS = (
+    'usuario-register', 'usuario-login', 'usuario-refresh', 'usuario-details',
+    'tarea-list', 'tarea-filter-completed', 'tarea-detail', 'tarea-detail-many', 'tarea-search',
+    'tarea-stats', 'tarea-changes', 'tarea-export', 'tarea-create', 'tarea-update', 'tarea-bulk', 'tarea-import',
+    'tarea-async-list', 'tarea-async-detail', 'tarea-async-create', 'tarea-async-update',
+    'tarea-delete', 'tarea-async-delete',
+)
+DELETE_ENDPOINTS = ('tarea-delete', 'tarea-async-delete')
+POSTGRES_ONLY = ('tarea-search',)
+
+# Lower is better for these, higher for throughput.
+MAXIMUMS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')
+
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed --users users with --tareas tareas each, send --requests requests '
+        'to every tarea and user endpoint at --concurrency, and print '
+        'throughput, p50/p95/p99 latency and queries per request as JSON. With '
+        '--baseline (a previous --output), fail when an endpoint is slower, '
+        'makes more queries or has lower throughput than the baseline allows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tareas', type=int, default=100, help='Tareas to seed per user.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS, dest='endpoints',
+                            help='Only benchmark this endpoint; repeat for several. Defaults to all.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for picking users and tareas.')
+        parser.add_argument('--output', help='Also write the results to this file.')
+        parser.add_argument('--baseline', help='Results of an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative regression against the baseline (default 0.2).')
+
+    def handle(self, *args, users, tareas, requests, concurrency, endpoints, seed, output, baseline,
+               tolerance, **options):
+        if users < 1 or tareas < 1 or requests < 1 or concurrency < 1:
+            raise CommandError('--users, --tareas, --requests and --concurrency must be at least 1.')
+        if concurrency > 1:
+            require_shared_database()
+
+        endpoints = [name for name in ENDPOINTS if name in (endpoints or ENDPOINTS)]
+        if connection.vendor != 'postgresql':
+            endpoints = [name for name in endpoints if name not in POSTGRES_ONLY]
+        deletes = sum(name in DELETE_ENDPOINTS for name in endpoints) * requests
+        if deletes > users * tareas:
+            raise CommandError(f'The delete endpoints need at least {deletes} seeded tareas.')
+
+        config = {
+            'users': users,
+            'tareas': tareas,
+            'requests': requests,
+            'concurrency': concurrency,
+            'seed': seed,
+            'database': connection.vendor,
+        }
+        baseline_results = None
+        if baseline:
+            with open(baseline) as f:
+                baseline_report = json.load(f)
+            different = [key for key, value in config.items() if baseline_report['config'].get(key) != value]
+            if different:
+                raise CommandError(f'The baseline was run with a different {", ".join(different)}.')
+            baseline_results = baseline_report['endpoints']
+
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        try:
+            started = time.perf_counter()
+            self.seed(prefix, users, tareas)
+            seed_seconds = time.perf_counter() - started
+
+            # The query counts are read from the Server-Timing header.
+            with unthrottled(SERVER_TIMING=True):
+                results = {}
+                rng = random.Random(seed)
+                for name in endpoints:
+                    plan = [getattr(self, f'plan_{name.replace("-", "_")}')(rng, number) for number in range(requests)]
+                    results[name] = self.run(plan, concurrency)
+        finally:
+            Usuario.objects.filter(username__startswith=f'{prefix}-').delete()
+
+        report = {
+            'config': {**config, 'seed_seconds': round(seed_seconds, 2)},
+            'endpoints': results,
+        }
+        if output:
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2)
+        self.stdout.write(json.dumps(report, indent=2))
+
+        failures = [f'{name}: {result["errors"]} failed requests' for name, result in results.items() if result['errors']]
+        if baseline_results is not None:
+            failures += self.compare(results, baseline_results, tolerance)
+        if failures:
+            raise CommandError('Benchmark failed:\n' + '\n'.join(failures))
+
+    def seed(self, prefix, users, tareas):
+        # Hashing once and sharing the hash keeps seeding fast; login still
+        # pays for checking it.
+        password = make_password(PASSWORD)
+        self.users = Usuario.objects.bulk_create(
+            Usuario(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password)
+            for i in range(users)
+        )
+        self.prefix = prefix
+        self.access_tokens = {}
+        self.refresh_tokens = {}
+        for user in self.users:
+            refresh = RefreshToken.for_user(user)
+            self.refresh_tokens[user.pk] = str(refresh)
+            self.access_tokens[user.pk] = str(refresh.access_token)
+
+        created = Tarea.objects.bulk_create(
+            (
+                Tarea(title=f'Benchmark tarea {i}', description='Seeded by manage.py benchmark',
+                      completed=i % 3 == 0, owner=user)
+                for user in self.users for i in range(tareas)
+            ),
+            batch_size=1000
+        )
+        self.tareas = [(tarea.owner_id, tarea.pk) for tarea in created]
+        self.tareas_by_user = {}
+        for owner_id, pk in self.tareas:
+            self.tareas_by_user.setdefault(owner_id, []).append(pk)
+
+        # Shrinks as the delete requests are planned.
+        self.remaining = list(self.tareas)
+
+    def run(self, plan, concurrency):
+        def request(spec):
+            user_id, method, path, kwargs = spec
+            client = Client()
+            if user_id is not None:
+                client.cookies[ACCESS_COOKIE] = self.access_tokens[user_id]
+                client.cookies[REFRESH_COOKIE] = self.refresh_tokens[user_id]
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+            match = QUERIES_RE.search(response.get('Server-Timing', ''))
+            return elapsed, int(match.group(1)) if match else 0, response.status_code >= 400
+
+        outcomes, elapsed = run_concurrently(request, plan, concurrency)
+        result = summarize([latency for latency, _, _ in outcomes], elapsed)
+        result['queries_per_request'] = round(sum(queries for _, queries, _ in outcomes) / len(outcomes), 2)
+        result['errors'] = sum(failed for _, _, failed in outcomes)
+        return result
+
+    def compare(self, results, baseline, tolerance):
+        failures = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            for metric in MAXIMUMS:
+                limit = expected[metric] * (1 + tolerance)
+                if result[metric] > limit:
+                    failures.append(f'{name}: {metric} {result[metric]} > {round(limit, 2)}')
+            limit = expected['throughput'] * (1 - tolerance)
+            if result['throughput'] < limit:
+                failures.append(f'{name}: throughput {result["throughput"]} < {round(limit, 2)}')
+        return failures
+
+    # Each plan_* method returns (user_id, client method, path, kwargs) for
+    # request ``number`` of its endpoint.
+
+    def pick_user(self, rng):
+        return rng.choice(self.users).pk
+
+    def pick_tarea(self, rng):
+        return rng.choice(self.remaining)
+
+    def plan_usuario_register(self, rng, number):
+        username = f'{self.prefix}-new-{number}'
+        data = {'username': username, 'email': f'{username}@example.com', 'password': PASSWORD}
+        return None, 'post', reverse('usuario-register'), {'data': data}
+
+    def plan_usuario_login(self, rng, number):
+        username = rng.choice(self.users).username
+        data = {'username': username, 'password': PASSWORD}
+        return None, 'post', reverse('usuario-login'), {'data': data}
+
+    def plan_usuario_refresh(self, rng, number):
+        return self.pick_user(rng), 'post', reverse('usuario-refresh'), {}
+
+    def plan_usuario_details(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('usuario-details'), {}
+
+    def plan_tarea_list(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-list'), {}
+
+    def plan_tarea_filter_completed(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-filter-completed'), {}
+
+    def plan_tarea_detail(self, rng, number):
+        owner_id, pk = self.pick_tarea(rng)
+        return owner_id, 'get', reverse('tarea-detail', kwargs={'pk': pk}), {}
+
+    def plan_tarea_detail_many(self, rng, number):
+        owner_id = self.pick_user(rng)
+        ids = rng.sample(self.tareas_by_user[owner_id], min(10, len(self.tareas_by_user[owner_id])))
+        return owner_id, 'get', reverse('tarea-detail-many'), {'data': {'ids': ','.join(map(str, ids))}}
+
+    def plan_tarea_search(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-search'), {'data': {'q': 'benchmark'}}
+
+    def plan_tarea_stats(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-stats'), {}
+
+    def plan_tarea_changes(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-changes'), {}
+
+    def plan_tarea_export(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-export'), {}
+
+    def plan_tarea_create(self, rng, number):
+        data = {'title': f'Benchmark create {number}'}
+        return self.pick_user(rng), 'post', reverse('tarea-create'), {'data': data}
+
+    def plan_tarea_update(self, rng, number):
+        owner_id, pk = self.pick_tarea(rng)
+        data = {'completed': rng.random() < 0.5}
+        return owner_id, 'patch', reverse('tarea-update', kwargs={'pk': pk}), {
+            'data': data, 'content_type': 'application/json'
+        }
+
+    def plan_tarea_bulk(self, rng, number):
+        owner_id, pk = self.pick_tarea(rng)
+        data = {'operations': [
+            {'op': 'create', 'data': {'title': f'Benchmark bulk {number}'}},
+            {'op': 'update', 'id': pk, 'data': {'completed': True}},
+        ]}
+        return owner_id, 'post', reverse('tarea-bulk'), {'data': data, 'content_type': 'application/json'}
+
+    def plan_tarea_import(self, rng, number):
+        rows = ''.join(json.dumps({'title': f'Benchmark import {number}-{i}'}) + '\n' for i in range(10))
+        upload = SimpleUploadedFile('tareas.ndjson', rows.encode())
+        return self.pick_user(rng), 'post', reverse('tarea-import'), {'data': {'file': upload}}
+
+    def plan_tarea_async_list(self, rng, number):
+        return self.pick_user(rng), 'get', reverse('tarea-async-list'), {}
+
+    def plan_tarea_async_detail(self, rng, number):
+        owner_id, pk = self.pick_tarea(rng)
+        return owner_id, 'get', reverse('tarea-async-detail', kwargs={'pk': pk}), {}
+
+    def plan_tarea_async_create(self, rng, number):
+        data = {'title': f'Benchmark create {number}'}
+        return self.pick_user(rng), 'post', reverse('tarea-async-create'), {
+            'data': data, 'content_type': 'application/json'
+        }
+
+    def plan_tarea_async_update(self, rng, number):
+        owner_id, pk = self.pick_tarea(rng)
+        data = {'completed': rng.random() < 0.5}
+        return owner_id, 'patch', reverse('tarea-async-update', kwargs={'pk': pk}), {
+            'data': data, 'content_type': 'application/json'
+        }
+
+    def plan_tarea_delete(self, rng, number):
+        owner_id, pk = self.remaining.pop()
+        return owner_id, 'delete', reverse('tarea-delete', kwargs={'pk': pk}), {}
+
+    def plan_tarea_async_delete(self, rng, number):
+        owner_id, pk = self.remaining.pop()
+        return owner_id, 'delete', reverse('tarea-async-delete', kwargs={'pk': pk}), {}
@@ -0,0 +1,154 @@
+"""
+In-process request metrics in the Prometheus text format.
+
+``MetricsMiddleware`` records, for every request, a counter and a latency
+histogram keyed by URL name, method and status class (``2xx``, ``4xx``...).
+Histograms use the fixed ``BUCKETS``, so a collector can compute p50/p99 per
+route with ``histogram_quantile``.
+
+Each worker process keeps its own registry. When ``METRICS_MULTIPROCESS_DIR``
+is set, every process also writes its series to ``<dir>/metrics-<pid>.json``
+(at most every ``METRICS_FLUSH_SECONDS``), and ``/metrics`` sums the files of
+all processes, so any worker can answer a scrape. Empty the directory when
+the server is restarted, as the Prometheus client's multiprocess mode asks.
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FILE_PREFIX = 'metrics-'
+
+
+def get_multiprocess_dir():
+    return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+
+def get_flush_seconds():
+    return getattr(settings, 'METRICS_FLUSH_SECONDS', 1.0)
+
+
+def status_class(status_code):
+    return f'{status_code // 100}xx'
+
+
+class MetricsRegistry:
+    """
+    Request series keyed by ``(route, method, status)``. Each series is a
+    list of per-bucket counts, one more for ``+Inf``, then the sum of the
+    observed durations.
+    """
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
+            self.pid = os.getpid()
+            self.flushed_at = 0.0
+
+    def observe(self, route, method, status, duration):
+        index = bisect.bisect_left(self.buckets, duration)
+        key = (route, method, status)
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked from a process that had already served requests.
+                self.series = {}
+                self.pid = os.getpid()
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += duration
+
+    def snapshot(self):
+        with self.lock:
+            return {key: list(series) for key, series in self.series.items()}
+
+    def get_path(self, directory):
+        return Path(directory) / f'{FILE_PREFIX}{os.getpid()}.json'
+
+    def maybe_flush(self):
+        directory = get_multiprocess_dir()
+        if directory and time.monotonic() - self.flushed_at >= get_flush_seconds():
+            self.flush(directory)
+
+    def flush(self, directory):
+        self.flushed_at = time.monotonic()
+        data = {
+            'buckets': self.buckets,
+            'series': [[*key, *series] for key, series in self.snapshot().items()],
+        }
+        # Written to a temporary file and renamed, so readers never see half of it.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.get_path(directory))
+
+    def collect(self):
+        """
+        Return the series of this process, summed with those of the other
+        processes when ``METRICS_MULTIPROCESS_DIR`` is set.
+        """
+        directory = get_multiprocess_dir()
+        if not directory:
+            return self.snapshot()
+
+        self.flush(directory)
+        totals = {}
+        for path in Path(directory).glob(f'{FILE_PREFIX}*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Removed or replaced while reading.
+                continue
+            if tuple(data['buckets']) != self.buckets:
+                continue
+            for route, method, status, *series in data['series']:
+                total = totals.setdefault((route, method, status), [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        return totals
+
+    def render(self):
+        lines = [
+            '# HELP http_requests_total Requests by URL name, method and status class.',
+            '# TYPE http_requests_total counter',
+        ]
+        series = sorted(self.collect().items())
+        for (route, method, status), values in series:
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            lines.append(f'http_requests_total{{{labels}}} {sum(values[:-1])}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Request latency by URL name, method and status class.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (route, method, status), values in series:
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            count = 0
+            for bound, value in zip((*self.buckets, '+Inf'), values[:-1]):
+                count += value
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[-1]}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name
@@ -0,0 +1,191 @@
+import time
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .metrics import get_route, registry, status_class
+from .routers import choose_replica, current_replica, get_replicas, pinned_to_primary
+from .timing import Timings, current_timings
+
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+KNOWN_METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def pin_request(request):
+    """
+    Pin writes, and reads within the sticky window of the client's last write,
+    to the primary, and pick the replica for the other reads. Returns the
+    tokens to reset both with.
+    """
+    pinned = request.method not in SAFE_METHODS
+    if not pinned:
+        try:
+            pinned = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            pass
+    return pinned_to_primary.set(pinned), current_replica.set(choose_replica())
+
+
+def unpin_request(tokens):
+    pinned_token, replica_token = tokens
+    current_replica.reset(replica_token)
+    pinned_to_primary.reset(pinned_token)
+
+
+def mark_write(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        window = get_sticky_seconds()
+        response.set_cookie(
+            STICKY_COOKIE,
+            value=str(round(time.time() + window, 3)),
+            max_age=window,
+            httponly=True,
+            samesite='Lax'
+        )
+    return response
+
+
+@sync_and_async_middleware
+def ReplicaStickinessMiddleware(get_response):
+    """
+    Keep a client on the primary database while it writes and for
+    ``REPLICA_STICKY_SECONDS`` afterwards, tracked with a cookie, and send the
+    other reads of a request to a single replica. Does nothing when no
+    replicas are configured.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not get_replicas():
+                return await get_response(request)
+            tokens = pin_request(request)
+            try:
+                response = await get_response(request)
+            finally:
+                unpin_request(tokens)
+            return mark_write(request, response)
+    else:
+        def middleware(request):
+            if not get_replicas():
+                return get_response(request)
+            tokens = pin_request(request)
+            try:
+                response = get_response(request)
+            finally:
+                unpin_request(tokens)
+            return mark_write(request, response)
+    return middleware
+
+
+@sync_and_async_middleware
+def ServerTimingMiddleware(get_response):
+    """
+    Report the time spent authenticating, in SQL, serializing and rendering,
+    the query count and the total in a ``Server-Timing`` header. Enabled by
+    the ``SERVER_TIMING`` setting.
+    """
+    if not getattr(settings, 'SERVER_TIMING', False):
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timings = Timings()
+            token = current_timings.set(timings)
+            try:
+                response = await get_response(request)
+            finally:
+                current_timings.reset(token)
+            response['Server-Timing'] = timings.header_value()
+            return response
+    else:
+        def middleware(request):
+            timings = Timings()
+            token = current_timings.set(timings)
+            try:
+                response = get_response(request)
+            finally:
+                current_timings.reset(token)
+            response['Server-Timing'] = timings.header_value()
+            return response
+    return middleware
+
+
+def record_request(request, response, started):
+    method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+    registry.observe(get_route(request), method, status_class(response.status_code), time.perf_counter() - started)
+    registry.maybe_flush()
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    """
+    Count requests and record their latency by URL name, method and status
+    class for ``/metrics``. Enabled by the ``METRICS_ENABLED`` setting.
+    """
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            response = await get_response(request)
+            record_request(request, response, started)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            response = get_response(request)
+            record_request(request, response, started)
+            return response
+    return middleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses of at least ``COMPRESSION_MIN_SIZE`` bytes with brotli
+    when the client accepts it and the ``brotli`` package is installed, or
+    with gzip otherwise. Streamed responses (exports) are gzipped as they are
+    sent, whatever their size, except event streams, which compression
+    would buffer.
+    """
+    brotli_quality = 4
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+        if (
+            brotli is None or response.streaming or response.has_header('Content-Encoding')
+            or not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = brotli.compress(response.content, quality=self.brotli_quality)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        # A weak ETag, as GZipMiddleware does, still matches conditional requests.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,63 @@
+"""
+JSON renderer and parser backed by orjson when it is installed.
+
+``ORJSONRenderer`` matches DRF's ``JSONRenderer`` with the default
+``COMPACT_JSON``, ``UNICODE_JSON`` and ``STRICT_JSON`` settings for everything
+but floats: the types orjson formats differently (datetimes, ``Decimal``, lazy
+strings...) are handed to DRF's encoder, and ``\\u2028``/``\\u2029`` are escaped
+the same way. Floats use orjson's shortest form (``1e16``, ``1e-7`` where the
+stdlib writes ``1e+16``, ``1e-07``), and NaN and infinities become ``null``
+where the stdlib renderer raises ``ValueError``; the API itself renders no
+floats. Pretty-printed output (``indent``), other settings, values orjson
+rejects and a missing orjson all fall back to the stdlib renderer.
+"""
+from rest_framework.utils import encoders
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from .timing import TimedRendererMixin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+LINE_SEPARATORS = (('\u2028'.encode(), b'\\u2028'), ('\u2029'.encode(), b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+    def default(self, obj):
+        return self.encoder.default(obj)
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedORJSONRenderer(TimedRendererMixin, ORJSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,65 @@
+"""
+Primary/replica database routing.
+
+Reads of the apps in ``DATABASE_REPLICA_APPS`` go to an alias from
+``DATABASE_REPLICAS``; every write, and every read inside a transaction on the
+primary, goes to ``default``. ``ReplicaStickinessMiddleware`` picks one
+replica per request in ``current_replica``, so that the queries of a request
+(e.g. a list's ETag aggregate and its page) see the same replication lag;
+outside a request each read picks one at random. A request is pinned to the
+primary while ``pinned_to_primary`` is set, which the middleware does for
+writes and for a short window after them, so clients read their own writes
+despite replication lag.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+current_replica = ContextVar('current_replica', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def reads_from_replica():
+    """
+    Whether reads routed by ``PrimaryReplicaRouter`` would go to a replica
+    right now.
+    """
+    return bool(
+        get_replicas()
+        and not pinned_to_primary.get()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+def choose_replica():
+    return random.choice(get_replicas())
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in getattr(settings, 'DATABASE_REPLICA_APPS', ()):
+            return None
+        if not reads_from_replica():
+            return DEFAULT_DB_ALIAS
+        return current_replica.get() or choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in get_replicas():
+            return False
+        return None
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from datetime import timedelta
+import copy
 from pathlib import Path
 import os
 from dotenv import load_dotenv
@@ -42,15 +43,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'gestor_tareas',
     'tarea',
     'users',
     'rest_framework',
-    'rest_framework_simplejwt'
+    'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
 ]
 
 AUTH_USER_MODEL = 'users.Usuario'
 
 MIDDLEWARE = [
+    'gestor_tareas.middleware.MetricsMiddleware',
+    'gestor_tareas.middleware.CompressionMiddleware',
+    'gestor_tareas.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,12 +65,46 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'gestor_tareas.middleware.ReplicaStickinessMiddleware',
 ]
 
+# Add a Server-Timing header with auth, SQL, serializer and renderer timings
+# and the query count to every response.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+
+# Smaller responses are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Shared by all worker processes of a server; empty it on restart.
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR') or None
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+# /metrics requires 'Authorization: Bearer <token>' and answers 404 until
+# a token is set.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':(
         'users.authentication.JWTAuthenticationFromCookie',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'gestor_tareas.renderers.TimedORJSONRenderer',
+        'gestor_tareas.renderers.TimedBrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'gestor_tareas.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # Token buckets for users.throttling: 'N/period' allows a burst of N that
+    # refills over the period. None disables a bucket.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_username': '5/min',
+        'register_ip': '10/hour',
+        'register_username': '5/hour',
+        'tarea_write_user': '300/min',
+    },
 }
 
 SIMPLE_JWT = { 
@@ -124,9 +165,95 @@ DATABASES = {
         'PASSWORD': os.getenv('PASSWORD'),
         'HOST': os.getenv('HOST'),
         'PORT': os.getenv('PORT'),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Connection reuse. With DB_POOL=true each process keeps a psycopg 3 pool
+# (Django's native pooling): connections are closed after DB_POOL_MAX_IDLE idle
+# seconds or DB_POOL_MAX_LIFETIME seconds of age. Otherwise DB_CONN_MAX_AGE
+# (off by default) keeps connections open per thread. Only set it under WSGI:
+# under ASGI the ORM runs on sync_to_async threads that would each hold a
+# connection, so use the pool there. Either way connections are health-checked
+# before reuse.
+DB_POOL = os.getenv('DB_POOL', '').lower() in ('1', 'true', 'yes')
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+
+# Read replicas: DB_REPLICA_HOSTS is a comma-separated list of host[:port]
+# entries that replicate the default database with the same credentials.
+# Reads of the apps in DATABASE_REPLICA_APPS are spread over them, except for
+# clients that wrote within the last REPLICA_STICKY_SECONDS; keep that window
+# above twice the worst replication lag. Pointing a replica at the primary's
+# own host is enough to try the routing locally.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['gestor_tareas.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_APPS = ['tarea']
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '10'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The local-memory backend is per process; point CACHE_BACKEND/CACHE_LOCATION
+# at a shared cache (e.g. Redis) when running more than one worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# Seconds a rendered tarea list page stays cached. Writes invalidate it sooner.
+TAREA_LIST_CACHE_TIMEOUT = 300
+
+# tareas/changes: deleted ids are kept this long for syncing clients (prune
+# them with `manage.py prune_tarea_tombstones`), and a caught-up client
+# re-reads the last few seconds in case a slow transaction commits late.
+TAREA_TOMBSTONE_RETENTION_DAYS = int(os.getenv('TAREA_TOMBSTONE_RETENTION_DAYS', 30))
+TAREA_SYNC_LAG_SECONDS = 5
+
+# Completed tareas unchanged for this long are moved to the archive table by
+# `manage.py archive_tareas` (e.g. nightly).
+TAREA_ARCHIVE_AFTER_DAYS = int(os.getenv('TAREA_ARCHIVE_AFTER_DAYS', 180))
+
+# tareas/stream: the backend that carries events to every worker process
+# (the default reaches this process only), how many events per connected user
+# are kept for Last-Event-ID resume and for how long after they disconnect,
+# how many a slow client may fall behind before it is reset, and how often an
+# idle stream gets a keepalive comment.
+TAREA_EVENTS_BACKEND = os.getenv('TAREA_EVENTS_BACKEND', 'tarea.events.InProcessBackend')
+TAREA_STREAM_REPLAY_SIZE = 100
+TAREA_STREAM_REPLAY_SECONDS = 60
+TAREA_STREAM_QUEUE_SIZE = 100
+TAREA_STREAM_HEARTBEAT_SECONDS = 15
+
+# Seconds to cache the user behind an access token; 0 (the default) disables
+# it. Entries never outlive the token itself and keep only the id, username and
+# is_active flag.
+JWT_USER_CACHE_TIMEOUT = int(os.getenv('JWT_USER_CACHE_TIMEOUT', '0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
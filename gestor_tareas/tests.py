@@ -0,0 +1,606 @@
+import json
+import os
+import re
+import tempfile
+import gzip
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipIf, skipUnless
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tarea.models import ArchivedTarea, Tarea, TareaStats
+from users.models import Usuario
+from .benchmarking import summarize
+from .db import get_pool_stats
+from .management.commands.benchmark import ENDPOINTS
+from .metrics import BUCKETS, MetricsRegistry, registry
+from .middleware import brotli
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer, orjson
+from .middleware import STICKY_COOKIE
+from .routers import PrimaryReplicaRouter, pinned_to_primary
+from .timing import Timings, current_timings, measure
+
+
+class DatabasePoolStatsTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpassword'
+        )
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        self.client = APIClient()
+
+    def test_pool_stats_requires_staff(self):
+        """Test that only staff users can read the pool counters"""
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(reverse('db-pool-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_pool_stats(self):
+        """Test that the pool counters match the configured connection mode"""
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('db-pool-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pooled'], bool(connection.settings_dict['OPTIONS'].get('pool')))
+        self.assertEqual(response.data['stats'], get_pool_stats())
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_replicas(self):
+        """Test that tarea reads are spread over the replicas"""
+        self.assertIn(self.router.db_for_read(Tarea), ['replica_0', 'replica_1'])
+        self.assertEqual(self.router.db_for_write(Tarea), 'default')
+
+    def test_other_apps_read_from_primary(self):
+        """Test that only the configured apps are routed to replicas"""
+        self.assertIsNone(self.router.db_for_read(Usuario))
+
+    def test_pinned_reads_go_to_primary(self):
+        """Test that a pinned request reads from the primary"""
+        token = pinned_to_primary.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Tarea), 'default')
+        finally:
+            pinned_to_primary.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test that reads stay on the primary without replicas"""
+        self.assertEqual(self.router.db_for_read(Tarea), 'default')
+
+    def test_migrations_skip_replicas(self):
+        """Test that the schema is only migrated on the primary"""
+        self.assertFalse(self.router.allow_migrate('replica_0', 'tarea'))
+        self.assertIsNone(self.router.allow_migrate('default', 'tarea'))
+
+
+REPLICAS = ['replica_0', 'replica_1']
+
+
+class ReplicaMirrorMixin:
+    """
+    Add ``REPLICAS`` as TEST MIRROR aliases of the test database, as the test
+    runner does for the replicas configured with ``DB_REPLICA_HOSTS``, so the
+    queries routed to them run on connections of their own. The aliases only
+    exist once the class is set up, hence ``__all__``.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        for alias in REPLICAS:
+            connections.settings[alias] = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+            connections[alias].creation.set_as_test_mirror(connections['default'].settings_dict)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+    def capture_replica_queries(self):
+        contexts = {alias: CaptureQueriesContext(connections[alias]) for alias in REPLICAS}
+        for context in contexts.values():
+            self.enterContext(context)
+        return contexts
+
+
+# Not in a test transaction: the router sends reads inside one to the primary.
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaStickinessTests(ReplicaMirrorMixin, APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_write_sets_sticky_cookie(self):
+        """Test that a successful write pins the client to the primary"""
+        response = self.client.post(reverse('tarea-create'), {'title': 'Sticky Tarea'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(float(response.cookies[STICKY_COOKIE].value), time.time())
+
+        # Check that failed writes and reads do not
+        response = APIClient().post(reverse('tarea-create'), {'title': 'AB'})
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        response = self.client.get(reverse('tarea-list'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_request_reads_from_one_replica(self):
+        """Test that every read of a request goes to the same replica"""
+        for _ in range(10):
+            with CaptureQueriesContext(connections['replica_0']) as first, \
+                    CaptureQueriesContext(connections['replica_1']) as second:
+                response = self.client.get(reverse('tarea-detail-many'), {'ids': '1,2', 'include_archived': '1'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            # The live tareas, then the archived ones for the missing ids
+            self.assertEqual(sorted([len(first), len(second)]), [0, 2])
+
+    def test_pinned_client_reads_from_primary(self):
+        """Test that a client within the sticky window never reads from a replica"""
+        queries = self.capture_replica_queries()
+        self.client.cookies[STICKY_COOKIE] = str(time.time() + 10)
+
+        response = self.client.get(reverse('tarea-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([len(context) for context in queries.values()], [0, 0])
+
+    def test_pinned_client_exports_from_primary(self):
+        """Test that a pinned client's streamed export reads from the primary"""
+        Tarea.objects.create(title='Exported Tarea', owner=self.user)
+        queries = self.capture_replica_queries()
+        self.client.cookies[STICKY_COOKIE] = str(time.time() + 10)
+
+        response = self.client.get(reverse('tarea-export'))
+        with CaptureQueriesContext(connections['default']) as primary:
+            content = b''.join(response.streaming_content)
+
+        self.assertIn(b'Exported Tarea', content)
+        self.assertEqual(len(primary), 1)
+        self.assertEqual([len(context) for context in queries.values()], [0, 0])
+
+    def test_pinned_client_skips_list_cache(self):
+        """Test that a pinned client never reads a page cached from a replica"""
+        self.client.get(reverse('tarea-list'))
+        self.assertEqual(self.client.get(reverse('tarea-list'))['X-Cache'], 'HIT')
+
+        self.client.cookies[STICKY_COOKIE] = str(time.time() + 10)
+        self.assertEqual(self.client.get(reverse('tarea-list'))['X-Cache'], 'MISS')
+
+        # Check that an expired window uses the cache again
+        self.client.cookies[STICKY_COOKIE] = str(time.time() - 1)
+        self.assertEqual(self.client.get(reverse('tarea-list'))['X-Cache'], 'HIT')
+
+    def test_transactions_read_from_primary(self):
+        """Test that reads inside a transaction stay on the primary"""
+        queries = self.capture_replica_queries()
+        list(Tarea.objects.all())
+        self.assertEqual(sum(len(context) for context in queries.values()), 1)
+
+        with transaction.atomic():
+            list(Tarea.objects.all())
+        self.assertEqual(sum(len(context) for context in queries.values()), 1)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaWriteTests(ReplicaMirrorMixin, APITransactionTestCase):
+    def setUp(self):
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+
+    def test_bulk_writes_outside_requests_use_primary(self):
+        """Test that the bulk write overrides never read or lock on a replica outside a request"""
+        queries = self.capture_replica_queries()
+
+        tareas = Tarea.objects.bulk_create([Tarea(title=f'Tarea {i}', owner=self.user) for i in range(3)])
+        Tarea.objects.filter(owner=self.user).update(completed=True)
+        for tarea in tareas:
+            tarea.completed = False
+        Tarea.objects.bulk_update(tareas, ['completed'])
+        Tarea.objects.filter(pk=tareas[0].pk).delete()
+        self.assertEqual(TareaStats.objects.recount(), [])
+
+        self.assertEqual([len(context) for context in queries.values()], [0, 0])
+        stats = TareaStats.objects.using('default').get(owner=self.user)
+        self.assertEqual((stats.total, stats.completed), (2, 0))
+
+    def test_archive_uses_primary(self):
+        """Test that archive_tareas moves the rows on the primary with replicas configured"""
+        tarea = Tarea.objects.create(title='Old Tarea', owner=self.user)
+        Tarea.objects.filter(pk=tarea.pk).update(completed=True, updated_at=timezone.now() - timedelta(days=365))
+        queries = self.capture_replica_queries()
+
+        call_command('archive_tareas', days=30, stdout=StringIO())
+
+        self.assertEqual([len(context) for context in queries.values()], [0, 0])
+        self.assertFalse(Tarea.objects.using('default').exists())
+        self.assertTrue(ArchivedTarea.objects.using('default').filter(pk=tarea.pk).exists())
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user with a tarea
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        Tarea.objects.create(title='Timed Tarea', owner=self.user)
+
+        # Authenticate with the cookie so the auth phase runs
+        self.client = APIClient()
+        self.client.cookies['access_token_cookie'] = str(AccessToken.for_user(self.user))
+
+    def test_server_timing_header(self):
+        """Test that a list request reports every phase and the query count"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tarea-list'))
+
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(list(metrics), ['auth', 'db', 'serialize', 'render', 'total'])
+        self.assertEqual(metrics['db']['desc'], f'"{len(queries.captured_queries)} queries"')
+        for metric in metrics.values():
+            self.assertGreaterEqual(float(metric['dur']), 0)
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=300)
+    def test_server_timing_cache_hit(self):
+        """Test that a cached list page and user report no queries and no serializing"""
+        self.client.get(reverse('tarea-list'))
+        response = self.client.get(reverse('tarea-list'))
+
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(metrics['db']['desc'], '"0 queries"')
+        self.assertNotIn('serialize', metrics)
+
+    async def test_server_timing_async_view(self):
+        """Test that queries run by the async ORM are counted too"""
+        self.async_client.cookies['access_token_cookie'] = self.client.cookies['access_token_cookie'].value
+
+        response = await self.async_client.get(reverse('tarea-async-list'))
+
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertIn('auth', metrics)
+        self.assertNotEqual(metrics['db']['desc'], '"0 queries"')
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test that the header can be turned off"""
+        response = self.client.get(reverse('tarea-list'))
+
+        self.assertNotIn('Server-Timing', response)
+
+
+class MeasureTests(SimpleTestCase):
+    def test_nested_phases_count_once(self):
+        """Test that nested blocks of one phase are not counted twice"""
+        timings = Timings()
+        token = current_timings.set(timings)
+        try:
+            with measure('serialize'):
+                with measure('serialize'):
+                    pass
+        finally:
+            current_timings.reset(token)
+
+        self.assertEqual(list(timings.durations), ['serialize'])
+        self.assertNotIn('serialize', timings.active)
+
+    def test_measure_without_request(self):
+        """Test that measuring outside a request is a no-op"""
+        with measure('render'):
+            pass
+
+        self.assertIsNone(current_timings.get())
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+        # Create a test user
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        self.client = APIClient()
+
+    def get_metrics(self):
+        return self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_requests_recorded_by_route_and_status(self):
+        """Test that requests are counted by URL name, method and status class"""
+        self.client.force_authenticate(user=self.user)
+        self.client.get(reverse('tarea-list'))
+        self.client.get(reverse('tarea-list'))
+        self.client.get(reverse('tarea-detail', kwargs={'pk': 999}))
+
+        samples = parse_metrics(self.get_metrics().content.decode())
+        self.assertEqual(samples['http_requests_total{route="tarea-list",method="GET",status="2xx"}'], 2)
+        self.assertEqual(samples['http_requests_total{route="tarea-detail",method="GET",status="4xx"}'], 1)
+
+        # Check that the histogram buckets are cumulative and end with the count
+        labels = 'route="tarea-list",method="GET",status="2xx"'
+        self.assertEqual(samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 2)
+        self.assertEqual(samples[f'http_request_duration_seconds_count{{{labels}}}'], 2)
+        buckets = [samples[f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}}'] for bound in BUCKETS]
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_unmatched_urls_share_a_route(self):
+        """Test that unknown paths do not create a series each"""
+        self.client.get('/no-such-page')
+
+        response = self.get_metrics()
+        self.assertIn('route="unmatched",method="GET",status="4xx"', response.content.decode())
+
+    def test_metrics_token(self):
+        """Test that the endpoint requires the bearer token when one is set"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.get_metrics()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_hidden_without_token(self):
+        """Test that the endpoint does not exist until a token is configured"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_404_NOT_FOUND)
+
+        # Check that requests are still recorded for when it is enabled
+        self.client.get(reverse('tarea-list'))
+        self.assertIn('http_requests_total', registry.render())
+
+    def test_multiprocess_aggregation(self):
+        """Test that the series written by other processes are summed in"""
+        with tempfile.TemporaryDirectory() as directory:
+            other = {
+                'buckets': BUCKETS,
+                'series': [['tarea-list', 'GET', '2xx', 1, *[0] * len(BUCKETS), 0.002]],
+            }
+            with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+                json.dump(other, f)
+
+            with override_settings(METRICS_MULTIPROCESS_DIR=directory):
+                self.client.force_authenticate(user=self.user)
+                self.client.get(reverse('tarea-list'))
+                text = self.get_metrics().content.decode()
+
+                # Check that this process wrote its own file
+                self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+
+        samples = parse_metrics(text)
+        self.assertEqual(samples['http_requests_total{route="tarea-list",method="GET",status="2xx"}'], 2)
+        self.assertGreaterEqual(
+            samples['http_request_duration_seconds_bucket{route="tarea-list",method="GET",status="2xx",le="0.005"}'], 1
+        )
+
+    def test_registry_buckets(self):
+        """Test that an observation lands in the first bucket it fits"""
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        metrics.observe('tarea-list', 'GET', '2xx', 0.1)
+        metrics.observe('tarea-list', 'GET', '2xx', 0.5)
+        metrics.observe('tarea-list', 'GET', '2xx', 3.0)
+
+        counts = metrics.snapshot()[('tarea-list', 'GET', '2xx')]
+        self.assertEqual(counts[:-1], [1, 1, 1])
+        self.assertAlmostEqual(counts[-1], 3.6)
+        self.assertTrue(re.search(r'le="\+Inf"\} 3$', metrics.render(), re.MULTILINE))
+
+
+class BenchmarkCommandTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def run_benchmark(self, **options):
+        out = StringIO()
+        options = {'users': 2, 'tareas': 5, 'requests': 2, 'concurrency': 1, **options}
+        call_command('benchmark', stdout=out, **options)
+        return json.loads(out.getvalue())
+
+    def test_benchmark_every_endpoint(self):
+        """Test that every endpoint is driven without errors and the seed is removed"""
+        report = self.run_benchmark()
+
+        self.assertEqual(list(report['endpoints']), [name for name in ENDPOINTS if name != 'tarea-search'])
+        for result in report['endpoints'].values():
+            self.assertEqual(result['errors'], 0)
+            self.assertEqual(set(result), {
+                'requests', 'throughput', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request', 'errors'
+            })
+        # One query for the user and one for the tarea
+        self.assertEqual(report['endpoints']['tarea-detail']['queries_per_request'], 2)
+
+        # Check that the seeded users and their tareas were deleted
+        self.assertFalse(Usuario.objects.exists())
+        self.assertFalse(Tarea.objects.exists())
+
+    def test_benchmark_baseline_regression(self):
+        """Test that a result worse than the baseline fails the command"""
+        report = self.run_benchmark(endpoint=['tarea-detail'])
+        report['endpoints']['tarea-detail']['queries_per_request'] = 0.5
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline:
+            json.dump(report, baseline)
+            baseline.flush()
+
+            with self.assertRaisesMessage(CommandError, 'tarea-detail: queries_per_request'):
+                self.run_benchmark(endpoint=['tarea-detail'], baseline=baseline.name)
+
+            # Check that a baseline from another configuration is refused
+            with self.assertRaisesMessage(CommandError, 'different requests'):
+                self.run_benchmark(endpoint=['tarea-detail'], baseline=baseline.name, requests=3)
+
+
+class BenchmarkingTests(SimpleTestCase):
+    def test_summarize(self):
+        """Test that latencies are summarized in milliseconds with percentiles"""
+        result = summarize([i / 1000 for i in range(100, 0, -1)], elapsed=2)
+
+        self.assertEqual(result, {
+            'requests': 100, 'throughput': 50.0, 'p50_ms': 50.5, 'p95_ms': 95.0, 'p99_ms': 99.0
+        })
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    data = {
+        'results': [{
+            'id': 1,
+            'title': 'Tarea ñ ✓ \u2028 "quoted"',
+            'created_at': timezone.now(),
+            'amount': Decimal('1.50'),
+            'label': gettext_lazy('Lazy'),
+            1: None,
+        }],
+        'next': None,
+    }
+
+    def test_same_bytes_as_json_renderer(self):
+        """Test that the orjson renderer output is byte-identical to DRF's without floats"""
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_float_formatting(self):
+        """Test that floats use orjson's shortest form and non-finite ones become null"""
+        data = {'large': 1e16, 'small': 1e-7, 'plain': 1.5, 'nan': float('nan'), 'inf': float('inf')}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), b'{"large":1e16,"small":1e-7,"plain":1.5,"nan":null,"inf":null}'
+        )
+        self.assertEqual(JSONRenderer().render({'large': 1e16, 'small': 1e-7}), b'{"large":1e+16,"small":1e-07}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'nan': float('nan')})
+
+    def test_indent_falls_back(self):
+        """Test that pretty-printing is left to the stdlib renderer"""
+        rendered = ORJSONRenderer().render(self.data, 'application/json; indent=4')
+
+        self.assertEqual(rendered, JSONRenderer().render(self.data, 'application/json; indent=4'))
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_parser(self):
+        """Test that bodies are parsed and invalid JSON raises ParseError"""
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"title": "ñ"}'.encode())), {'title': 'ñ'})
+
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": NaN}'))
+
+
+class CompressionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user with enough tareas for a large list
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        Tarea.objects.bulk_create(Tarea(title=f'Tarea {i}', owner=self.user) for i in range(20))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_large_response_gzipped(self):
+        """Test that a large list is gzipped with a weak ETag"""
+        plain = self.client.get(reverse('tarea-list'))
+        response = self.client.get(reverse('tarea-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        # Check that the weak ETag still revalidates
+        response = self.client.get(
+            reverse('tarea-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100000)
+    def test_small_response_not_compressed(self):
+        """Test that responses under COMPRESSION_MIN_SIZE are sent as is"""
+        response = self.client.get(reverse('tarea-list'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertNotIn('Content-Encoding', response)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli is used when the client accepts it"""
+        plain = self.client.get(reverse('tarea-list'))
+        response = self.client.get(reverse('tarea-list'), HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_benchmark_render_command(self):
+        """Test that the render benchmark reports identical output"""
+        out = StringIO()
+        call_command('benchmark_render', rows=50, repeat=1, stdout=out)
+
+        result = json.loads(out.getvalue())
+        self.assertTrue(result['identical'])
+        self.assertLess(result['gzip_bytes'], result['bytes'])
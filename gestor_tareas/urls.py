@@ -16,9 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from .views import DatabasePoolStatsView, metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
     path('tareas/', include('tarea.urls')),
+    path('db/pool', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,39 @@
+import hmac
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework import permissions, response, views
+
+from .db import get_pool_stats
+from .metrics import registry
+
+
+class DatabasePoolStatsView(views.APIView):
+    """
+    Connection pool counters of this worker process, for staff users.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        settings_dict = connections['default'].settings_dict
+        stats = get_pool_stats('default')
+        return response.Response({
+            'pooled': stats is not None,
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+            'stats': stats,
+        })
+
+
+def metrics_view(request):
+    """
+    Request counters and latency histograms of all worker processes, in the
+    Prometheus text format. Requires the ``METRICS_TOKEN`` bearer token, and
+    does not exist until one is set.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
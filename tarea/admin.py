@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Tarea
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from .models import SEARCH_CONFIG, Tarea
 
 @admin.register(Tarea)
 class TareaAdmin(admin.ModelAdmin):
@@ -7,3 +9,15 @@ class TareaAdmin(admin.ModelAdmin):
     list_filter = ('completed', 'created_at', 'owner')
     search_fields = ('title', 'description', 'owner__username')
     readonly_fields = ('created_at',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use the full-text index on Postgres instead of ``ILIKE '%term%'``
+        scans; an exact username match still finds a user's tareas.
+        """
+        if connection.vendor != 'postgresql' or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+
+        query = SearchQuery(search_term, config=SEARCH_CONFIG, search_type='websearch')
+        matches = queryset.filter(search_vector=query) | queryset.filter(owner__username=search_term.strip())
+        return matches, False
@@ -0,0 +1,229 @@
+"""
+Native async versions of the tarea list, detail, create, update and delete
+endpoints, and the ``tareas/stream`` Server-Sent Events endpoint.
+
+Under ASGI the DRF views in ``tarea.views`` each occupy a worker thread for
+the whole request. These views await the async ORM instead, so a single event
+loop can serve many concurrent requests. They return the same JSON shapes and
+apply the same validation and owner scoping; the list supports the same
+filters and cursor pagination but skips the list cache and conditional GET.
+"""
+import asyncio
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from users.authentication import JWTAuthenticationFromCookie
+from users.throttling import UserThrottle
+from .events import OVERFLOW, broker
+from .filters import filter_tareas
+from .models import Tarea
+from .pagination import KeysetPagination
+from .serializers import TareaListSerializer, TareaSerializer
+from .views import clean_update_data
+
+
+def error_response(detail, status):
+    return JsonResponse(detail if isinstance(detail, dict) else {'detail': detail}, status=status)
+
+
+class AsyncTareaView(View):
+    """
+    Base class: authenticates from the JWT cookie and throttles writes before
+    dispatching and, like DRF's ``APIView``, is exempt from Django's CSRF
+    middleware.
+    """
+    authentication_class = JWTAuthenticationFromCookie
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authentication_class()
+        try:
+            auth = await authenticator.aauthenticate(request)
+        except (AuthenticationFailed, InvalidToken) as exc:
+            return error_response(exc.detail, exc.status_code)
+
+        if auth is None:
+            response = error_response('Authentication credentials were not provided.', 401)
+            response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+
+        request.user, request.auth = auth
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            wait = await self.check_throttles(request)
+            if wait is not None:
+                response = error_response('Request was throttled.', 429)
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(exc.detail, exc.status_code)
+
+    async def check_throttles(self, request):
+        """
+        Return the longest wait in seconds if any throttle rejects the
+        request, otherwise ``None``.
+        """
+        waits = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                waits.append(throttle.wait())
+        return max(waits) if waits else None
+
+    def get_queryset(self):
+        return Tarea.objects.filter(owner=self.request.user)
+
+    def get_json(self):
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise ValidationError({'detail': 'JSON parse error.'})
+        if not isinstance(data, dict):
+            raise ValidationError({'detail': 'Expected a JSON object.'})
+        return data
+
+    def serialize_rows(self, rows):
+        serializer = TareaListSerializer(rows, many=True, context={'owner': self.request.user.username})
+        return serializer.data
+
+    async def get_row(self, pk):
+        try:
+            return await self.get_queryset().values(*TareaListSerializer.value_fields).aget(pk=pk)
+        except Tarea.DoesNotExist:
+            return None
+
+
+class AsyncTareaListView(AsyncTareaView):
+    async def get(self, request):
+        queryset = filter_tareas(self.get_queryset(), request.GET)
+        paginator = KeysetPagination()
+        rows = await paginator.apaginate_queryset(queryset.values(*TareaListSerializer.value_fields), request)
+        return JsonResponse({'next': paginator.get_next_link(), 'results': self.serialize_rows(rows)})
+
+
+class AsyncTareaDetailView(AsyncTareaView):
+    async def get(self, request, pk):
+        row = await self.get_row(pk)
+        if row is None:
+            return error_response('No Tarea matches the given query.', 404)
+        return JsonResponse(self.serialize_rows([row])[0])
+
+
+class AsyncTareaCreateView(AsyncTareaView):
+    async def post(self, request):
+        serializer = TareaSerializer(data=self.get_json())
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        tarea = await Tarea.objects.acreate(**serializer.validated_data, owner=request.user)
+        return JsonResponse(TareaSerializer(tarea).data, status=201)
+
+
+class AsyncTareaUpdateView(AsyncTareaView):
+    async def patch(self, request, pk):
+        try:
+            tarea = await self.get_queryset().defer('search_vector').aget(pk=pk)
+        except Tarea.DoesNotExist:
+            return error_response('No Tarea matches the given query.', 404)
+        tarea.owner = request.user
+
+        data, error = clean_update_data(self.get_json())
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        serializer = TareaSerializer(tarea, data=data, partial=True)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+
+        try:
+            tarea = await sync_to_async(self.save)(pk, serializer.validated_data)
+        except Tarea.DoesNotExist:
+            return error_response('No Tarea matches the given query.', 404)
+        tarea.owner = request.user
+        return JsonResponse(TareaSerializer(tarea).data)
+
+    def save(self, pk, data):
+        # Like TareaUpdateView: lock the row so that the counters are
+        # adjusted from its current values. The async ORM has no transactions.
+        with transaction.atomic():
+            tarea = self.get_queryset().defer('search_vector').select_for_update().get(pk=pk)
+            for field, value in data.items():
+                setattr(tarea, field, value)
+            tarea.save(update_fields=[*data, 'updated_at'])
+        return tarea
+
+
+class AsyncTareaDeleteView(AsyncTareaView):
+    async def delete(self, request, pk):
+        deleted, _ = await self.get_queryset().filter(pk=pk).adelete()
+        if not deleted:
+            return error_response('No Tarea matches the given query.', 404)
+        return HttpResponse(status=204)
+
+
+def get_heartbeat():
+    return getattr(settings, 'TAREA_STREAM_HEARTBEAT_SECONDS', 15)
+
+
+def format_event(event_type, data, event_id=None):
+    frame = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{frame}event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+class TareaStreamView(AsyncTareaView):
+    """
+    Push ``created``, ``updated`` and ``deleted`` events for the user's
+    tareas as Server-Sent Events, and ``sync`` after bulk changes, which
+    clients follow up with ``tareas/changes``. A ``reset`` event means events
+    were lost: the client reloads its tareas, and reconnects if the stream
+    then ends. Needs an ASGI server; under WSGI it would hold a thread per
+    connection.
+    """
+    async def get(self, request):
+        response = StreamingHttpResponse(
+            self.stream(request.user.pk, request.headers.get('Last-Event-ID')),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, owner_id, last_event_id):
+        subscriber, missed = broker.subscribe(owner_id, last_event_id)
+        try:
+            yield 'retry: 3000\n\n'
+            if missed is None:
+                yield format_event('reset', {})
+            for event in missed or ():
+                yield format_event(event.type, event.data, event.id)
+
+            heartbeat = get_heartbeat()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is OVERFLOW:
+                    yield format_event('reset', {})
+                    return
+                yield format_event(event.type, event.data, event.id)
+        finally:
+            broker.unsubscribe(subscriber)
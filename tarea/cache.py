@@ -0,0 +1,121 @@
+"""
+Per-user cache of rendered tarea list pages.
+
+Cached pages are keyed by owner, a per-owner version number and the request
+path with its query string. Any write to one of the owner's tareas bumps the
+version, which orphans every page cached for that owner at once; orphaned
+entries simply expire.
+
+With read replicas a page may be built from data that has not replicated the
+latest write yet. Such pages are only kept for half the sticky window, and
+clients pinned to the primary skip the cache, so a client never gets a stale
+page back after its own write.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from gestor_tareas.routers import pinned_to_primary, reads_from_replica
+
+KEY_PREFIX = 'tarea-list'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'TAREA_LIST_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'TAREA_LIST_CACHE_TIMEOUT', 300)
+
+
+def version_key(owner_id):
+    return f'{KEY_PREFIX}:{owner_id}:version'
+
+
+def get_version(owner_id):
+    cache = get_cache()
+    key = version_key(owner_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so that a version evicted from the
+        # cache never comes back as a number that older pages were stored under.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(owner_id):
+    try:
+        get_cache().incr(version_key(owner_id))
+    except ValueError:
+        # No version yet: the next read seeds a fresh one.
+        pass
+
+
+def invalidate(owner_ids):
+    """
+    Invalidate the cached list pages of every given owner.
+
+    The version is bumped right away, so the writing transaction never reads
+    its own stale pages, and again on commit, so a page cached by a concurrent
+    request from pre-commit data is discarded as soon as the write is visible.
+    """
+    owner_ids = {owner_id for owner_id in owner_ids if owner_id is not None}
+    for owner_id in owner_ids:
+        bump_version(owner_id)
+
+    def bump_on_commit():
+        for owner_id in owner_ids:
+            bump_version(owner_id)
+
+    if owner_ids:
+        transaction.on_commit(bump_on_commit)
+
+
+def get_key(request):
+    owner_id = request.user.pk
+    digest = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:{owner_id}:{get_version(owner_id)}:{digest}'
+
+
+def get_page(key):
+    if pinned_to_primary.get():
+        record(MISSES_KEY)
+        return None
+    data = get_cache().get(key)
+    record(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def get_replica_timeout():
+    return max(getattr(settings, 'REPLICA_STICKY_SECONDS', 10) // 2, 1)
+
+
+def set_page(key, data):
+    timeout = get_timeout()
+    if reads_from_replica():
+        timeout = min(timeout, get_replica_timeout())
+    get_cache().set(key, data, timeout)
+
+
+def record(counter_key):
+    cache = get_cache()
+    cache.add(counter_key, 0, timeout=None)
+    try:
+        cache.incr(counter_key)
+    except ValueError:
+        pass
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,84 @@
+"""
+Validators for conditional GET on tarea endpoints.
+
+Single tareas carry an ``ETag`` and a ``Last-Modified`` derived from
+``updated_at``, so that polling clients can revalidate with ``If-None-Match``
+or ``If-Modified-Since`` and get an empty 304 instead of the full payload.
+Lists carry only an ``ETag``, which follows the owner's list cache version
+(see ``tarea.cache``): removing a tarea other than the newest leaves the
+newest ``updated_at`` as it was, and aggregating every row would cost as much
+as the list itself.
+"""
+import hashlib
+import time
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from gestor_tareas.routers import reads_from_replica
+from . import cache
+from .fields import get_fields
+from .filters import include_archived
+
+
+def make_etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def get_instance_validators(instance, request):
+    """
+    Return the ``ETag`` and ``Last-Modified`` of a single tarea response.
+
+    The ETag also covers what shapes the representation: the ``fields``
+    requested, ``include_archived`` and the username, which is in the response
+    as ``owner`` and changes on a rename.
+    """
+    params = request.query_params
+    fields = get_fields(params)
+    etag = make_etag(
+        instance.pk,
+        instance.updated_at.isoformat(),
+        ','.join(fields) if fields is not None else '',
+        include_archived(params),
+        request.user.username,
+    )
+    return etag, instance.updated_at
+
+
+def get_list_etag(cache_key, request):
+    """
+    Return the ``ETag`` of a list response without querying the tareas.
+
+    It is derived from the page's ``tarea.cache`` key, which holds the owner's
+    list version, bumped on every write to their tareas and on a rename, and
+    the path with its query string, since every page and filter is a
+    different response. A replica may not have the latest write yet when its
+    page is built, so ETags of replica reads expire with the window their
+    cached pages are kept for.
+    """
+    parts = [cache_key, request.user.username]
+    if reads_from_replica():
+        parts.append(int(time.time() // cache.get_replica_timeout()))
+    return make_etag(*parts)
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """
+    Return a 304 (or 412) response if the request's preconditions allow it,
+    otherwise ``None``.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let clients keep a copy but always revalidate it.
+    response['Cache-Control'] = 'private, no-cache'
+    return response
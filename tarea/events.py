@@ -0,0 +1,211 @@
+"""
+Tarea change events for the ``tareas/stream`` Server-Sent Events endpoint.
+
+Saves and deletes publish an ``Event`` once their transaction commits (see
+``tarea.signals`` and ``TareaQuerySet``). The event goes to the backend named
+by ``TAREA_EVENTS_BACKEND``, which hands it to ``broker.deliver`` in every
+process that may hold subscribers. The default ``InProcessBackend`` delivers
+it straight to this process's broker; with several worker processes, a
+backend on a shared message bus (e.g. Redis pub/sub) must call
+``broker.deliver`` in each of them.
+
+The broker keeps the last ``TAREA_STREAM_REPLAY_SIZE`` events of every
+connected owner, and of owners disconnected less than
+``TAREA_STREAM_REPLAY_SECONDS`` ago, so a client reconnecting with
+``Last-Event-ID`` gets what it missed. Each subscriber is an
+``asyncio.Queue`` of ``TAREA_STREAM_QUEUE_SIZE`` events on its event loop:
+an idle connection costs a queue and a suspended coroutine, not a thread. A subscriber that falls behind until its queue fills is sent
+``reset`` and disconnected instead of buffering without bound.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Sent to a subscriber instead of the events it could not keep up with.
+OVERFLOW = object()
+
+
+def get_replay_size():
+    return getattr(settings, 'TAREA_STREAM_REPLAY_SIZE', 100)
+
+
+def get_replay_seconds():
+    return getattr(settings, 'TAREA_STREAM_REPLAY_SECONDS', 60)
+
+
+def get_queue_size():
+    return getattr(settings, 'TAREA_STREAM_QUEUE_SIZE', 100)
+
+
+@dataclass
+class Event:
+    owner_id: int
+    type: str
+    data: dict
+    number: int = None
+
+    @property
+    def id(self):
+        return f'{broker.token}-{self.number}'
+
+
+@dataclass(eq=False)
+class Subscriber:
+    owner_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(init=False)
+    overflowed: bool = field(default=False, init=False)
+
+    def __post_init__(self):
+        self.queue = asyncio.Queue(maxsize=get_queue_size())
+
+    def offer(self, event):
+        # Runs on the subscriber's loop.
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+        else:
+            self.queue.put_nowait(event)
+
+
+class Broker:
+    """
+    Fans events out to the subscribers of their owner, from any thread.
+
+    Replay history is only kept for owners with a subscriber, and for
+    ``TAREA_STREAM_REPLAY_SECONDS`` after their last one leaves so that it
+    can reconnect; events of other owners are dropped. Memory therefore
+    follows the connected users, not every user who ever wrote.
+    """
+    def __init__(self):
+        # Event ids carry the broker's token so that an id from another
+        # process, or from before a restart, is not mistaken for one of ours.
+        self.token = uuid.uuid4().hex[:8]
+        self.last_number = 0
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.history = {}
+        # Number of the newest event of each owner that is not in its history.
+        self.evicted = {}
+        # When the last subscriber of an owner with history left.
+        self.left = {}
+
+    def deliver(self, event):
+        with self.lock:
+            self.last_number += 1
+            event.number = self.last_number
+            self.expire_history()
+            history = self.history.get(event.owner_id)
+            if history is not None:
+                if len(history) == history.maxlen:
+                    self.evicted[event.owner_id] = history[0].number
+                history.append(event)
+            subscribers = list(self.subscribers.get(event.owner_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                # The loop was closed under a subscriber that never left.
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, owner_id, last_event_id=None):
+        """
+        Return ``(subscriber, missed)``. ``missed`` lists the events after
+        ``last_event_id``, or is ``None`` when they are no longer all known
+        and the client has to resync.
+        """
+        subscriber = Subscriber(owner_id, asyncio.get_running_loop())
+        with self.lock:
+            self.expire_history()
+            self.subscribers[owner_id].add(subscriber)
+            self.left.pop(owner_id, None)
+            if owner_id not in self.history:
+                self.history[owner_id] = deque(maxlen=get_replay_size())
+                self.evicted[owner_id] = self.last_number
+            missed = [] if last_event_id is None else self.get_missed(owner_id, last_event_id)
+        return subscriber, missed
+
+    def get_missed(self, owner_id, last_event_id):
+        token, _, number = last_event_id.partition('-')
+        if token != self.token or not number.isdigit():
+            return None
+        number = int(number)
+        if number < self.evicted[owner_id]:
+            return None
+        return [event for event in self.history[owner_id] if event.number > number]
+
+    def expire_history(self):
+        # Called with the lock held.
+        cutoff = time.monotonic() - get_replay_seconds()
+        for owner_id in [owner_id for owner_id, left in self.left.items() if left <= cutoff]:
+            del self.left[owner_id], self.history[owner_id], self.evicted[owner_id]
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(subscriber.owner_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[subscriber.owner_id]
+                    self.left[subscriber.owner_id] = time.monotonic()
+
+    def history_count(self):
+        with self.lock:
+            return len(self.history)
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+
+class InProcessBackend:
+    """
+    Deliver events to this process only. Enough for a single ASGI worker
+    process, which then has to serve every stream.
+    """
+    def publish(self, event):
+        broker.deliver(event)
+
+
+broker = Broker()
+backends = {}
+
+
+def get_backend():
+    path = getattr(settings, 'TAREA_EVENTS_BACKEND', 'tarea.events.InProcessBackend')
+    if path not in backends:
+        backends[path] = import_string(path)()
+    return backends[path]
+
+
+def publish_on_commit(events, using=None):
+    """
+    Publish ``events`` once the current transaction commits, or right away
+    outside one. Nothing is published for a rolled back transaction.
+    """
+    events = [event for event in events if event.owner_id is not None]
+    if events:
+        transaction.on_commit(lambda: [get_backend().publish(event) for event in events], using=using)
+
+
+def tarea_data(tarea):
+    """
+    The loaded fields of ``tarea`` in ``TareaListSerializer`` form, without
+    the owner (every event goes to the owner).
+    """
+    from .serializers import TareaListSerializer
+
+    deferred = tarea.get_deferred_fields()
+    row = {name: getattr(tarea, name) for name in TareaListSerializer.value_fields if name not in deferred}
+    return TareaListSerializer(row, context={'fields': tuple(row)}).data
@@ -0,0 +1,89 @@
+"""
+Streaming export of tareas as NDJSON or CSV.
+
+Rows are read with ``QuerySet.iterator()``, or ``aiterator()`` under ASGI (a
+server-side cursor on Postgres), and encoded in small batches, so memory stays
+flat however many tareas a user has.
+"""
+import csv
+import json
+
+from .serializers import TareaListSerializer
+
+COLUMNS = ['id', 'title', 'description', 'completed', 'created_at', 'updated_at', 'owner']
+CHUNK_SIZE = 2000
+LINES_PER_YIELD = 500
+
+
+class Echo:
+    """
+    File-like object whose ``write`` returns the value instead of storing it,
+    so ``csv.writer`` can produce one line at a time.
+    """
+    def write(self, value):
+        return value
+
+
+def encode_ndjson(owner):
+    serializer = TareaListSerializer(context={'owner': owner})
+
+    def encode(row):
+        return json.dumps(serializer.to_representation(row), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    return [], encode
+
+
+def encode_csv(owner):
+    serializer = TareaListSerializer(context={'owner': owner})
+    writer = csv.writer(Echo())
+
+    def encode(row):
+        item = serializer.to_representation(row)
+        return writer.writerow([item[column] for column in COLUMNS])
+
+    return [writer.writerow(COLUMNS)], encode
+
+
+def iter_batches(header, encode, rows):
+    batch = list(header)
+    for row in rows:
+        batch.append(encode(row))
+        if len(batch) >= LINES_PER_YIELD:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+async def aiter_batches(header, encode, rows):
+    batch = list(header)
+    async for row in rows:
+        batch.append(encode(row))
+        if len(batch) >= LINES_PER_YIELD:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+ENCODERS = {
+    'ndjson': encode_ndjson,
+    'csv': encode_csv,
+}
+
+
+def stream_tareas(queryset, owner, export_format, chunk_size=CHUNK_SIZE):
+    header, encode = ENCODERS[export_format](owner)
+    rows = queryset.values(*TareaListSerializer.value_fields).iterator(chunk_size=chunk_size)
+    return iter_batches(header, encode, rows)
+
+
+def astream_tareas(queryset, owner, export_format, chunk_size=CHUNK_SIZE):
+    """
+    ``stream_tareas`` as an async generator, for ASGI. Django reads a sync
+    iterator into a list before sending it under ASGI, which would hold the
+    whole export in memory.
+    """
+    header, encode = ENCODERS[export_format](owner)
+    rows = queryset.values(*TareaListSerializer.value_fields).aiterator(chunk_size=chunk_size)
+    return aiter_batches(header, encode, rows)
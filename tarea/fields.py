@@ -0,0 +1,70 @@
+"""
+Sparse fieldsets for tarea read endpoints: ``?fields=id,title,completed``.
+
+Only the columns behind the requested fields are selected, so a list that
+shows titles and checkboxes never reads ``description``. The extra
+``description_preview`` field holds the first ``PREVIEW_LENGTH`` characters
+of the description, cut in SQL with ``Substr`` so the full text stays in the
+database.
+"""
+from django.db.models.functions import Substr
+from rest_framework.exceptions import ValidationError
+
+FIELDS = ('id', 'title', 'description', 'description_preview', 'completed', 'created_at', 'updated_at', 'owner')
+DEFAULT_FIELDS = tuple(name for name in FIELDS if name != 'description_preview')
+PREVIEW_LENGTH = 100
+
+# Not columns: ``owner`` is the requesting user and the preview is computed.
+COMPUTED_FIELDS = ('owner', 'description_preview')
+
+
+def get_fields(params):
+    """
+    Return the fields requested with ``fields``, in the default output order,
+    or ``None`` when the parameter is absent or empty.
+    """
+    value = params.get('fields', '')
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if not requested:
+        return None
+
+    unknown = sorted(requested.difference(FIELDS))
+    if unknown:
+        raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}. Must be any of: {', '.join(FIELDS)}."})
+    return tuple(name for name in FIELDS if name in requested)
+
+
+def get_columns(fields, *required):
+    return list(dict.fromkeys((*required, *(name for name in fields if name not in COMPUTED_FIELDS))))
+
+
+def description_preview():
+    return Substr('description', 1, PREVIEW_LENGTH)
+
+
+def select_values(queryset, fields, default):
+    """
+    ``queryset.values()`` for ``fields``. ``id`` and ``created_at`` are always
+    selected because the page cursor is built from them.
+    """
+    if fields is None:
+        return queryset.values(*default)
+    columns = get_columns(fields, 'id', 'created_at')
+    if 'description_preview' in fields:
+        return queryset.values(*columns, description_preview=description_preview())
+    return queryset.values(*columns)
+
+
+def select_instances(queryset, fields):
+    """
+    Defer every column not behind ``fields``. ``updated_at`` is always loaded
+    for the conditional GET validators.
+    """
+    columns = get_columns(fields, 'id', 'updated_at')
+    if 'owner' in fields:
+        queryset = queryset.select_related('owner')
+        columns.append('owner__username')
+    queryset = queryset.only(*columns)
+    if 'description_preview' in fields:
+        queryset = queryset.annotate(description_preview=description_preview())
+    return queryset
@@ -0,0 +1,92 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+BOOLEAN_VALUES = {
+    'true': True, '1': True,
+    'false': False, '0': False,
+}
+
+# Every ordering ends with ``id`` so it stays deterministic and can be
+# paginated by keyset over the ``(owner, created_at, id)`` indexes.
+ORDERINGS = {
+    'created_at': ('created_at', 'id'),
+    '-created_at': ('-created_at', '-id'),
+}
+DEFAULT_ORDERING = 'created_at'
+
+
+def parse_boolean(name, value):
+    try:
+        return BOOLEAN_VALUES[value.lower()]
+    except KeyError:
+        raise ValidationError({name: 'Must be true or false.'})
+
+
+def parse_timestamp(name, value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            date = parse_date(value)
+            if date is not None:
+                parsed = datetime.combine(date, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Must be an ISO 8601 date or datetime.'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_ordering(params):
+    value = params.get('ordering', DEFAULT_ORDERING)
+    try:
+        return ORDERINGS[value]
+    except KeyError:
+        raise ValidationError({'ordering': f"Must be one of: {', '.join(ORDERINGS)}."})
+
+
+def include_archived(params):
+    """
+    Whether ``include_archived=true|1`` asks for the archived tareas too
+    (see ``ArchivedTarea``).
+    """
+    return parse_boolean('include_archived', params.get('include_archived', 'false'))
+
+
+def filter_tareas(queryset, params):
+    """
+    Apply the supported query parameters to a tarea queryset.
+
+    Each filter maps to a plain column comparison so it can be answered by
+    one of the indexes declared on ``Tarea``:
+
+    - ``completed=true|false`` uses the partial completed/pending indexes.
+    - ``created_after`` / ``created_before`` are ranges on ``created_at``.
+    - ``title`` is a case-sensitive prefix match (``LIKE 'value%'``).
+    """
+    if 'completed' in params:
+        queryset = queryset.filter(completed=parse_boolean('completed', params['completed']))
+    if 'created_after' in params:
+        queryset = queryset.filter(created_at__gte=parse_timestamp('created_after', params['created_after']))
+    if 'created_before' in params:
+        queryset = queryset.filter(created_at__lt=parse_timestamp('created_before', params['created_before']))
+    if params.get('title'):
+        queryset = queryset.filter(title__startswith=params['title'])
+    return queryset
+
+
+class TareaFilterBackend(BaseFilterBackend):
+    """
+    Filter and validate the ordering of tarea lists from query parameters.
+
+    The ordering itself is applied by ``KeysetPagination`` so that the page
+    cursor always matches the sort order.
+    """
+    def filter_queryset(self, request, queryset, view):
+        get_ordering(request.query_params)
+        return filter_tareas(queryset, request.query_params)
@@ -0,0 +1,163 @@
+"""
+Streaming import of tareas from NDJSON or CSV.
+
+The input is read one line at a time and every row is validated with
+``TareaSerializer``. Valid rows are inserted with ``bulk_create`` in batches;
+invalid rows are reported by line number without stopping the import.
+"""
+import csv
+import json
+import time
+
+from .models import Tarea
+from .serializers import TareaSerializer
+
+FORMATS = ('ndjson', 'csv')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.elapsed = 0.0
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': errors})
+
+    @property
+    def rows_per_second(self):
+        rows = self.created + self.failed
+        return rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def decode_lines(lines):
+    """
+    Decode an iterable of byte lines as UTF-8, yielding ``(line, text)``.
+
+    Lines that are not valid UTF-8 come back as ``None`` so the caller can
+    report them. A leading byte order mark is dropped.
+    """
+    for number, raw in enumerate(lines, start=1):
+        if isinstance(raw, str):
+            text = raw
+        else:
+            try:
+                text = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                yield number, None
+                continue
+        if number == 1:
+            text = text.lstrip('\ufeff')
+        yield number, text
+
+
+def iter_ndjson_rows(lines):
+    """
+    Yield ``(line, row, error)`` for every non-blank NDJSON line.
+    """
+    for number, text in decode_lines(lines):
+        if text is None:
+            yield number, None, 'Line is not valid UTF-8.'
+            continue
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            yield number, None, 'Line is not valid JSON.'
+            continue
+        if not isinstance(row, dict):
+            yield number, None, 'Line must be a JSON object.'
+            continue
+        yield number, row, None
+
+
+def iter_csv_rows(lines):
+    """
+    Yield ``(line, row, error)`` for every CSV record after the header. The
+    line is where the record ends, so multi-line quoted fields are counted.
+    """
+    undecodable = []
+    position = {'line': 0}
+
+    def texts():
+        for number, text in decode_lines(lines):
+            position['line'] = number
+            if text is None:
+                undecodable.append(number)
+                continue
+            yield text
+
+    reader = csv.DictReader(texts())
+    try:
+        for row in reader:
+            while undecodable:
+                yield undecodable.pop(0), None, 'Line is not valid UTF-8.'
+            if None in row:
+                yield position['line'], None, 'Row has more columns than the header.'
+                continue
+            # Empty cells and missing trailing columns (None) mean "not given",
+            # which is also how the export writes null values, so drop them and
+            # let the serializer apply its defaults.
+            yield position['line'], {key: value for key, value in row.items() if value}, None
+    except csv.Error as exc:
+        yield position['line'], None, f'Malformed CSV: {exc}'
+    while undecodable:
+        yield undecodable.pop(0), None, 'Line is not valid UTF-8.'
+
+
+PARSERS = {
+    'ndjson': iter_ndjson_rows,
+    'csv': iter_csv_rows,
+}
+
+
+def import_tareas(lines, owner, import_format, batch_size=DEFAULT_BATCH_SIZE, max_errors=MAX_REPORTED_ERRORS):
+    """
+    Import tareas for ``owner`` from an iterable of lines and return an
+    ``ImportReport``. Each batch is committed on its own, so rows imported
+    before a failure stay imported.
+    """
+    report = ImportReport(max_errors=max_errors)
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        if batch:
+            Tarea.objects.bulk_create(batch)
+            report.created += len(batch)
+            batch.clear()
+
+    for line, row, error in PARSERS[import_format](lines):
+        if error:
+            report.add_error(line, error)
+            continue
+
+        serializer = TareaSerializer(data=row)
+        if not serializer.is_valid():
+            report.add_error(line, serializer.errors)
+            continue
+
+        batch.append(Tarea(**serializer.validated_data, owner=owner))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    report.elapsed = time.perf_counter() - started
+    return report
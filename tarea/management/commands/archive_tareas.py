@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tarea.models import Tarea
+
+
+def get_archive_age():
+    return timedelta(days=getattr(settings, 'TAREA_ARCHIVE_AFTER_DAYS', 180))
+
+
+class Command(BaseCommand):
+    help = (
+        'Move completed tareas that have not changed for TAREA_ARCHIVE_AFTER_DAYS '
+        'to the archive table, in batches that each commit on their own. An '
+        'interrupted run can simply be started again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Age in days; defaults to TAREA_ARCHIVE_AFTER_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, days, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if days is not None and days < 0:
+            raise CommandError('--days must not be negative.')
+        age = get_archive_age() if days is None else timedelta(days=days)
+        archived = Tarea.objects.archive(timezone.now() - age, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{archived} tareas archived.'))
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from gestor_tareas.benchmarking import require_shared_database, run_concurrently, seeded_user, summarize, unthrottled
+from tarea.models import Tarea
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent-request throughput of the DRF tarea views under the '
+        'WSGI handler with the native async views under the ASGI handler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--tareas', type=int, default=100, help='Tareas to seed for the benchmark user.')
+        parser.add_argument('--endpoint', choices=['list', 'detail'], default='list')
+
+    def handle(self, *args, requests, concurrency, tareas, endpoint, **options):
+        require_shared_database()
+
+        with seeded_user('async') as user:
+            created = Tarea.objects.bulk_create(Tarea(title=f'Tarea {i}', owner=user) for i in range(tareas))
+            token = str(AccessToken.for_user(user))
+            if endpoint == 'list':
+                sync_path, async_path = reverse('tarea-list'), reverse('tarea-async-list')
+            else:
+                kwargs = {'pk': created[0].pk}
+                sync_path, async_path = reverse('tarea-detail', kwargs=kwargs), reverse('tarea-async-detail', kwargs=kwargs)
+
+            with unthrottled():
+                results = {
+                    'wsgi_sync_views': self.run_wsgi(sync_path, token, requests, concurrency),
+                    'asgi_sync_views': self.run_asgi(sync_path, token, requests, concurrency),
+                    'asgi_async_views': self.run_asgi(async_path, token, requests, concurrency),
+                }
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_wsgi(self, path, token, requests, concurrency):
+        def request(number):
+            client = Client()
+            client.cookies['access_token_cookie'] = token
+            started = time.perf_counter()
+            # A unique query string keeps the list cache out of the comparison.
+            response = client.get(path, {'run': number})
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            return elapsed
+
+        return summarize(*run_concurrently(request, range(requests), concurrency))
+
+    def run_asgi(self, path, token, requests, concurrency):
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            client = AsyncClient()
+            client.cookies['access_token_cookie'] = token
+
+            async def request(number):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path, {'run': number})
+                    elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}')
+                return elapsed
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(request(number) for number in range(requests)))
+            return summarize(latencies, time.perf_counter() - started)
+
+        return asyncio.run(run())
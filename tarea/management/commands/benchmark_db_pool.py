@@ -0,0 +1,87 @@
+import copy
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from gestor_tareas.benchmarking import run_concurrently, seeded_user, summarize, unthrottled
+from gestor_tareas.db import get_pool_stats
+from tarea.models import Tarea
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request latency of tareas/detail when every request opens '
+        'its own connection, with persistent connections and with the psycopg '
+        'connection pool. Needs Postgres and psycopg 3 with psycopg_pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--min-size', type=int, default=2, help='Pool min_size.')
+        parser.add_argument('--max-size', type=int, default=8, help='Pool max_size.')
+
+    def handle(self, *args, requests, concurrency, min_size, max_size, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The connection pool needs Postgres.')
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            raise CommandError('The connection pool needs psycopg 3 with psycopg_pool (pip install "psycopg[pool]").')
+
+        settings_dict = connection.settings_dict
+        original = copy.deepcopy({key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'OPTIONS')})
+        with seeded_user('pool') as user:
+            tarea = Tarea.objects.create(title='Benchmark tarea', owner=user)
+            path = reverse('tarea-detail', kwargs={'pk': tarea.pk})
+            token = str(AccessToken.for_user(user))
+            modes = {
+                'new_connection': (0, None),
+                'persistent': (600, None),
+                'pool': (0, {'min_size': min_size, 'max_size': max_size}),
+            }
+
+            results = {}
+            try:
+                with unthrottled():
+                    for mode, (conn_max_age, pool) in modes.items():
+                        self.configure(settings_dict, original, conn_max_age, pool)
+                        try:
+                            results[mode] = self.run(path, token, requests, concurrency)
+                            if pool:
+                                results[mode]['pool_stats'] = get_pool_stats()
+                        finally:
+                            connection.close()
+                            connection.close_pool()
+            finally:
+                # Restore the settings before the seeded user is deleted.
+                self.configure(settings_dict, original, original['CONN_MAX_AGE'], None)
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def configure(self, settings_dict, original, conn_max_age, pool):
+        # Every thread's connection for this alias shares settings_dict.
+        connection.close()
+        settings_dict['CONN_MAX_AGE'] = conn_max_age
+        settings_dict['OPTIONS'] = copy.deepcopy(original['OPTIONS']) or {}
+        settings_dict['OPTIONS'].pop('pool', None)
+        if pool:
+            settings_dict['OPTIONS']['pool'] = pool
+
+    def run(self, path, token, requests, concurrency):
+        def request(_):
+            client = Client()
+            client.cookies['access_token_cookie'] = token
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            return elapsed
+
+        return summarize(*run_concurrently(request, range(requests), concurrency))
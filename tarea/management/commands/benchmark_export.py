@@ -0,0 +1,88 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from gestor_tareas.benchmarking import unique_name
+from tarea.export import stream_tareas
+from tarea.models import Tarea
+from tarea.serializers import TareaListSerializer
+from users.models import Usuario
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the peak Python memory of the streaming tarea export with a '
+        'fully materialized JSON list for growing numbers of tareas. Seeded '
+        'rows are rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        # Start above CHUNK_SIZE so the smallest run already holds a full cursor chunk.
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--format', dest='export_format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument(
+            '--max-growth', type=float, default=1.5,
+            help='Fail if the streaming peak at the largest size exceeds this multiple of the smallest.'
+        )
+        parser.add_argument(
+            '--skip-materialized', action='store_true',
+            help='Only measure the streaming export.'
+        )
+
+    def handle(self, *args, sizes, export_format, max_growth, skip_materialized, **options):
+        sizes = sorted(set(sizes))
+        self.stdout.write(f"{'rows':>10} {'stream peak':>14} {'stream time':>12} {'list peak':>14} {'bytes':>14}")
+
+        peaks = []
+        with transaction.atomic():
+            username = unique_name('export')
+            owner = Usuario.objects.create(username=username, email=f'{username}@example.com')
+            queryset = Tarea.objects.filter(owner=owner).order_by('created_at', 'id')
+
+            seeded = 0
+            for size in sizes:
+                Tarea.objects.bulk_create(
+                    (Tarea(title=f'Tarea {i}', description='x' * 200, owner=owner) for i in range(seeded, size)),
+                    batch_size=5000,
+                )
+                seeded = size
+
+                size_bytes, stream_peak, stream_time = measure(
+                    lambda: sum(len(chunk.encode('utf-8')) for chunk in stream_tareas(queryset, owner.username, export_format))
+                )
+                peaks.append(stream_peak)
+
+                list_peak = '-'
+                if not skip_materialized:
+                    _, peak, _ = measure(lambda: JSONRenderer().render(TareaListSerializer(
+                        queryset.values(*TareaListSerializer.value_fields),
+                        many=True,
+                        context={'owner': owner.username},
+                    ).data))
+                    list_peak = f'{peak / 1024:,.0f} KiB'
+
+                self.stdout.write(
+                    f'{size:>10,} {stream_peak / 1024:>10,.0f} KiB {stream_time:>11.2f}s {list_peak:>14} {size_bytes:>14,}'
+                )
+
+            transaction.set_rollback(True)
+
+        growth = peaks[-1] / peaks[0]
+        self.stdout.write(f'Streaming peak grew {growth:.2f}x from {sizes[0]:,} to {sizes[-1]:,} rows.')
+        if growth > max_growth:
+            raise CommandError(f'Streaming export memory grew more than {max_growth}x.')
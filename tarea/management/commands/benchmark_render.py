@@ -0,0 +1,70 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from gestor_tareas.middleware import CompressionMiddleware, brotli
+from gestor_tareas.renderers import ORJSONRenderer, orjson
+from tarea.serializers import TareaListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the time to render a tareas/list page of --rows tareas with '
+        'the stdlib JSON renderer and the orjson renderer, check that both '
+        'produce the same bytes, and report the response size uncompressed, '
+        'gzipped and with brotli. Needs no database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per renderer; the median is reported.')
+
+    def handle(self, *args, rows, repeat, **options):
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows and --repeat must be at least 1.')
+
+        now = timezone.now()
+        values = [
+            {
+                'id': i,
+                'title': f'Tarea {i} ✓',
+                'description': f'Description of tarea {i}, with some text to make it realistic. ' * 2,
+                'completed': i % 3 == 0,
+                'created_at': now - timedelta(minutes=i),
+                'updated_at': now,
+            }
+            for i in range(rows)
+        ]
+        data = {
+            'next': None,
+            'results': TareaListSerializer(values, many=True, context={'owner': 'benchmark'}).data,
+        }
+
+        results = {'rows': rows, 'orjson_installed': orjson is not None}
+        rendered = {}
+        for name, renderer in (('json', JSONRenderer()), ('orjson', ORJSONRenderer())):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rendered[name] = renderer.render(data, 'application/json')
+                timings.append(time.perf_counter() - started)
+            results[f'{name}_render_ms'] = round(statistics.median(timings) * 1000, 2)
+        results['identical'] = rendered['json'] == rendered['orjson']
+
+        content = rendered['orjson']
+        results['bytes'] = len(content)
+        started = time.perf_counter()
+        results['gzip_bytes'] = len(compress_string(content, max_random_bytes=CompressionMiddleware.max_random_bytes))
+        results['gzip_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        if brotli is not None:
+            started = time.perf_counter()
+            results['brotli_bytes'] = len(brotli.compress(content, quality=CompressionMiddleware.brotli_quality))
+            results['brotli_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tarea.importers import DEFAULT_BATCH_SIZE, FORMATS, MAX_REPORTED_ERRORS, import_tareas
+from users.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tareas for a user from an NDJSON or CSV file. Invalid rows are '
+        'reported by line number and skipped; valid rows are inserted in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--owner', required=True, help='Username that will own the imported tareas.')
+        parser.add_argument(
+            '--format', dest='import_format', choices=FORMATS,
+            help='Input format. Defaults to csv for .csv files and ndjson otherwise.'
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=MAX_REPORTED_ERRORS, help='Maximum number of row errors to print.')
+
+    def handle(self, *args, path, owner, import_format, batch_size, max_errors, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        try:
+            owner = Usuario.objects.get(username=owner)
+        except Usuario.DoesNotExist:
+            raise CommandError(f'User "{owner}" does not exist.')
+
+        import_format = import_format or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        try:
+            with open(path, 'rb') as lines:
+                report = import_tareas(lines, owner, import_format, batch_size=batch_size, max_errors=max_errors)
+        except OSError as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more row errors not shown.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} tareas, {report.failed} rows failed '
+            f'in {report.elapsed:.2f}s ({report.rows_per_second:,.0f} rows/s).'
+        ))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tarea.models import TareaTombstone
+from tarea.sync import get_retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the tombstones of deleted tareas older than the retention '
+        'period (TAREA_TOMBSTONE_RETENTION_DAYS). Clients whose sync cursor is '
+        'older than that have to sync from scratch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Retention in days; defaults to TAREA_TOMBSTONE_RETENTION_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, days, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        retention = get_retention() if days is None else timedelta(days=days)
+        deleted = TareaTombstone.objects.prune(timezone.now() - retention, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tombstones pruned.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tarea.models import TareaStats
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-derive the per-user TareaStats counters from the tareas and fix '
+        'every row that drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing the fixes.')
+
+    def handle(self, *args, dry_run, **options):
+        with transaction.atomic():
+            corrected = TareaStats.objects.recount()
+            if dry_run:
+                transaction.set_rollback(True)
+
+        for stats in corrected:
+            self.stdout.write(f'owner {stats.owner_id}: total={stats.total} completed={stats.completed}')
+        verb = 'would be repaired' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'{len(corrected)} counter rows {verb}.'))
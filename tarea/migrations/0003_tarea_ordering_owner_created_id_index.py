@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarea', '0002_tarea_owner_alter_tarea_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tarea',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='tarea_owner_created_id_idx'),
+        ),
+    ]
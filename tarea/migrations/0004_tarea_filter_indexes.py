@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarea', '0003_tarea_ordering_owner_created_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['owner', 'created_at', 'id'], name='tarea_owner_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['owner', 'created_at', 'id'], name='tarea_owner_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['owner', 'title'], name='tarea_owner_title_prefix_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    Tarea = apps.get_model('tarea', 'Tarea')
+    Tarea.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarea', '0004_tarea_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
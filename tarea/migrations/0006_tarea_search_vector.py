@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The tsvector is kept up to date by a trigger so that every write path,
+# including bulk_create, bulk_update and raw SQL, indexes title and
+# description. btree_gin lets one GIN index serve "owner = X AND
+# search_vector @@ query". Other databases only get the (unused) column.
+CREATE_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    """
+    CREATE OR REPLACE FUNCTION tarea_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tarea_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, search_vector ON tarea_tarea
+        FOR EACH ROW EXECUTE FUNCTION tarea_search_vector_update()
+    """,
+    """
+    UPDATE tarea_tarea SET search_vector =
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX tarea_owner_search_idx ON tarea_tarea USING gin (owner_id, search_vector)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS tarea_owner_search_idx",
+    "DROP TRIGGER IF EXISTS tarea_search_vector_trigger ON tarea_tarea",
+    "DROP FUNCTION IF EXISTS tarea_search_vector_update()",
+]
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarea', '0005_tarea_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_tarea_stats(apps, schema_editor):
+    Tarea = apps.get_model('tarea', 'Tarea')
+    TareaStats = apps.get_model('tarea', 'TareaStats')
+    counts = Tarea.objects.exclude(owner=None).order_by().values('owner_id').annotate(
+        total=models.Count('id'), completed=models.Count('id', filter=models.Q(completed=True))
+    )
+    TareaStats.objects.bulk_create(
+        (TareaStats(owner_id=row['owner_id'], total=row['total'], completed=row['completed']) for row in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarea', '0006_tarea_search_vector'),
+        ('users', '0002_alter_usuario_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tarea_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_tarea_stats, migrations.RunPython.noop),
+    ]
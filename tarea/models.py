@@ -1,17 +1,442 @@
-from django.db import models
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, router, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from users.models import Usuario
+from . import cache, events
+
+# Text search configuration used by the search_vector trigger and by queries.
+# 'simple' does no stemming, so it behaves the same for every language.
+SEARCH_CONFIG = 'simple'
 
 def validate_title_length(value):
     if len(value) < 3:
         raise ValidationError('Title must be at least 3 characters long.')
-    
+
+# Set while bulk_update() runs: it adjusts the counters and records the
+# tombstones itself, so the update() it delegates to must not.
+counting_in_bulk_update = ContextVar('counting_in_bulk_update', default=False)
+
+def count_deltas(added=(), removed=()):
+    """
+    Turn ``(owner_id, completed)`` pairs of added and removed tareas into
+    ``{owner_id: [total, completed]}`` counter deltas.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for owner_id, completed in rows:
+            deltas[owner_id][0] += sign
+            deltas[owner_id][1] += sign * bool(completed)
+    return deltas
+
+# Columns copied to ``ArchivedTarea``; ``id`` first.
+ARCHIVED_FIELDS = ('id', 'title', 'description', 'completed', 'created_at', 'updated_at', 'owner_id')
+
+def sync_events(owner_ids):
+    return [events.Event(owner_id, 'sync', {}) for owner_id in owner_ids]
+
+def on_write_db(queryset):
+    """
+    Return ``queryset`` bound to the database writes go to, unless it names
+    one itself. ``QuerySet.db`` is the read alias, a replica outside pinned
+    requests (see ``gestor_tareas.routers``), so the write overrides rebind
+    first to keep their reads, writes and transaction on the primary.
+    """
+    if queryset._db is not None:
+        return queryset
+    return queryset.using(router.db_for_write(queryset.model))
+
+class CountedDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet whose ``delete()`` adjusts the ``TareaStats`` counters, records
+    the tombstones and publishes the ``deleted`` events once per query rather
+    than once per row. Shared by live and archived tareas, which both count.
+    """
+    def delete(self):
+        if self._db is None:
+            return on_write_db(self).delete()
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Locking the rows keeps a concurrent delete of the same tareas
+            # from decrementing the counters twice.
+            removed = list(self.select_for_update().values_list('id', 'owner_id', 'completed'))
+            result = super().delete()
+            TareaStats.objects.adjust(count_deltas(removed=[(owner_id, completed) for _, owner_id, completed in removed]))
+            TareaTombstone.objects.record((pk, owner_id) for pk, owner_id, _ in removed)
+            events.publish_on_commit(
+                [events.Event(owner_id, 'deleted', {'id': pk}) for pk, owner_id, _ in removed], using=self.db
+            )
+        return result
+
+class TareaQuerySet(CountedDeleteQuerySet):
+    """
+    QuerySet that keeps ``updated_at``, the ``TareaStats`` counters, the
+    ``TareaTombstone`` rows, cached tarea lists and ``tareas/stream``
+    subscribers current on bulk writes.
+
+    ``update()``, ``bulk_create()`` and ``bulk_update()`` skip ``save()`` and
+    the model signals, so they stamp ``updated_at``, adjust the counters,
+    record tombstones for moved tareas, publish events and report the
+    affected owners themselves. ``delete()`` goes through the deletion
+    collector, which does send ``post_delete``, but adjusts the counters,
+    records the tombstones and publishes the events once per query rather
+    than once per row.
+
+    The rows changed by ``update()`` and ``bulk_update()`` are not reread,
+    so their owners get a single ``sync`` event telling them to fetch
+    ``tareas/changes``.
+    """
+    def update(self, **kwargs):
+        if self._db is None:
+            return on_write_db(self).update(**kwargs)
+        kwargs.setdefault('updated_at', timezone.now())
+        counted = {'owner', 'owner_id', 'completed'} & set(kwargs)
+        new_owner = kwargs.get('owner', kwargs.get('owner_id'))
+        # bulk_update() records its own tombstones.
+        moved = {'owner', 'owner_id'} & set(kwargs) and not counting_in_bulk_update.get()
+        with transaction.atomic(using=self.db, savepoint=False):
+            if moved:
+                # Moved tareas disappear from their previous owner's changes.
+                previous = list(self.values_list('id', 'owner_id'))
+                owner_ids = {owner_id for _, owner_id in previous}
+            else:
+                owner_ids = set(self.values_list('owner_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+            if new_owner is not None and not hasattr(new_owner, 'resolve_expression'):
+                owner_ids.add(getattr(new_owner, 'pk', new_owner))
+            if moved:
+                TareaTombstone.objects.record(
+                    (pk, owner_id) for pk, owner_id in previous
+                    if hasattr(new_owner, 'resolve_expression') or owner_id != getattr(new_owner, 'pk', new_owner)
+                )
+            if counted and not counting_in_bulk_update.get():
+                # The new values may be expressions, so recount these owners.
+                TareaStats.objects.recount(owner_ids)
+            if not counting_in_bulk_update.get():
+                events.publish_on_commit(sync_events(owner_ids), using=self.db)
+        cache.invalidate(owner_ids)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if self._db is None:
+            return on_write_db(self).bulk_create(objs, *args, **kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            TareaStats.objects.adjust(count_deltas(added=[(obj.owner_id, obj.completed) for obj in objs]))
+            # Without returned primary keys there is nothing to send but a sync.
+            events.publish_on_commit(
+                [events.Event(obj.owner_id, 'created', events.tarea_data(obj)) for obj in objs if obj.pk is not None]
+                + sync_events({obj.owner_id for obj in objs if obj.pk is None}),
+                using=self.db
+            )
+        cache.invalidate(obj.owner_id for obj in objs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if self._db is None:
+            return on_write_db(self).bulk_update(objs, fields, *args, **kwargs)
+        objs = list(objs)
+        if 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        owner_ids = {obj.owner_id for obj in objs}
+        counted = {'owner', 'owner_id', 'completed'} & set(fields)
+        with transaction.atomic(using=self.db, savepoint=False):
+            if counted:
+                previous = list(
+                    self.select_for_update().filter(pk__in=[obj.pk for obj in objs])
+                    .values_list('id', 'owner_id', 'completed')
+                )
+                owner_ids.update(owner_id for _, owner_id, _ in previous)
+            token = counting_in_bulk_update.set(True)
+            try:
+                rows = super().bulk_update(objs, fields, *args, **kwargs)
+            finally:
+                counting_in_bulk_update.reset(token)
+            if counted:
+                TareaStats.objects.adjust(count_deltas(
+                    added=[(obj.owner_id, obj.completed) for obj in objs],
+                    removed=[(owner_id, completed) for _, owner_id, completed in previous]
+                ))
+                new_owners = {obj.pk: obj.owner_id for obj in objs}
+                TareaTombstone.objects.record(
+                    (pk, owner_id) for pk, owner_id, _ in previous if new_owners[pk] != owner_id
+                )
+            events.publish_on_commit(sync_events(owner_ids), using=self.db)
+        cache.invalidate(owner_ids)
+        return rows
+
+    def archive(self, before, batch_size=1000):
+        """
+        Move the completed tareas last updated before ``before`` to
+        ``ArchivedTarea`` in batches of ``batch_size`` and return how many
+        were moved. Each batch commits on its own, so an interrupted run
+        keeps what it moved and the next run carries on from there.
+
+        The counters include archived tareas and stay as they are. The tareas
+        leave their owners' lists, so like deletions they get tombstones and
+        their owners a ``sync`` event.
+        """
+        if self._db is None:
+            return on_write_db(self).archive(before, batch_size)
+        archived = 0
+        while True:
+            with transaction.atomic(using=self.db):
+                # Rows locked by a concurrent write are left for the next run.
+                rows = list(
+                    self.filter(completed=True, updated_at__lt=before).order_by('updated_at', 'id')
+                    .select_for_update(skip_locked=True).values(*ARCHIVED_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    return archived
+                now = timezone.now()
+                ArchivedTarea.objects.using(self.db).bulk_create(
+                    [ArchivedTarea(**row, archived_at=now) for row in rows],
+                    update_conflicts=True, unique_fields=['id'], update_fields=[*ARCHIVED_FIELDS[1:], 'archived_at']
+                )
+                # Nothing references a tarea and the counters do not change,
+                # so skip the deletion collector and its per-row signals.
+                connection = connections[self.db]
+                table = connection.ops.quote_name(self.model._meta.db_table)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {table} WHERE id IN ({", ".join(["%s"] * len(rows))})',
+                        [row['id'] for row in rows]
+                    )
+                owner_ids = {row['owner_id'] for row in rows}
+                TareaTombstone.objects.using(self.db).record((row['id'], row['owner_id']) for row in rows)
+                events.publish_on_commit(sync_events(owner_ids), using=self.db)
+                cache.invalidate(owner_ids)
+            archived += len(rows)
+
 class Tarea(models.Model):
     title = models.CharField(max_length=255, validators=[validate_title_length])
     description = models.TextField(blank=True, null=True)
     completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='tareas', null=True, blank=True)
+    # Maintained by a database trigger on Postgres (see migration 0006).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TareaQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'id'], name='tarea_owner_created_id_idx'),
+            # Delta sync (``tareas/changes``) pages through this one.
+            models.Index(fields=['owner', 'updated_at', 'id'], name='tarea_owner_updated_id_idx'),
+            models.Index(
+                fields=['owner', 'created_at', 'id'],
+                condition=models.Q(completed=True),
+                name='tarea_owner_completed_idx',
+            ),
+            models.Index(
+                fields=['owner', 'created_at', 'id'],
+                condition=models.Q(completed=False),
+                name='tarea_owner_pending_idx',
+            ),
+            # Lets ``archive_tareas`` find the old completed tareas.
+            models.Index(
+                fields=['updated_at', 'id'],
+                condition=models.Q(completed=True),
+                name='tarea_completed_updated_idx',
+            ),
+            # varchar_pattern_ops lets Postgres answer ``title LIKE 'prefix%'``
+            # from the index regardless of the database collation.
+            models.Index(
+                fields=['owner', 'title'],
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+                name='tarea_owner_title_prefix_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The post_save signal adjusts TareaStats; keep it in this transaction.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+        self.remember_saved_values(kwargs.get('update_fields'))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            return super().delete(*args, **kwargs)
+
+    def remember_saved_values(self, update_fields=None):
+        """
+        Refresh ``_loaded_values`` after a save so the next save compares
+        against what is now in the database.
+        """
+        deferred = self.get_deferred_fields()
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if update_fields is None or field.name in update_fields or field.attname in update_fields:
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so signal handlers can tell what changed.
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+    def __str__(self):
+        return self.title
+
+
+class TareaStatsQuerySet(models.QuerySet):
+    def adjust(self, deltas):
+        """
+        Apply ``{owner_id: (total, completed)}`` deltas with ``F()`` updates,
+        creating the owner's row on its first tarea.
+        """
+        for owner_id, (total, completed) in deltas.items():
+            if owner_id is None or (total == 0 and completed == 0):
+                continue
+            changes = {'total': models.F('total') + total, 'completed': models.F('completed') + completed}
+            if self.filter(owner_id=owner_id).update(**changes) or total < 0:
+                continue
+            self.bulk_create([TareaStats(owner_id=owner_id)], ignore_conflicts=True)
+            self.filter(owner_id=owner_id).update(**changes)
+
+    def recount(self, owner_ids=None):
+        """
+        Re-derive the counters of ``owner_ids`` (every owner when ``None``)
+        from their tareas and write the rows that differ. Returns the
+        corrected ``TareaStats`` objects.
+        """
+        if self._db is None:
+            return on_write_db(self).recount(owner_ids)
+        sources = [model.objects.using(self.db).exclude(owner=None) for model in (Tarea, ArchivedTarea)]
+        stats = self.all()
+        if owner_ids is not None:
+            owner_ids = {owner_id for owner_id in owner_ids if owner_id is not None}
+            sources = [tareas.filter(owner_id__in=owner_ids) for tareas in sources]
+            stats = stats.filter(owner_id__in=owner_ids)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Lock the stored rows first: a concurrent write either committed
+            # before the count below or adjusts the recounted value after it.
+            stored = {
+                owner_id: (total, completed)
+                for owner_id, total, completed in stats.select_for_update().values_list('owner_id', 'total', 'completed')
+            }
+            actual = defaultdict(lambda: (0, 0), {owner_id: (0, 0) for owner_id in stored})
+            for tareas in sources:
+                for row in tareas.order_by().values('owner_id').annotate(
+                    total=models.Count('id'), completed=models.Count('id', filter=models.Q(completed=True))
+                ):
+                    total, completed = actual[row['owner_id']]
+                    actual[row['owner_id']] = (total + row['total'], completed + row['completed'])
+            corrected = [
+                TareaStats(owner_id=owner_id, total=total, completed=completed)
+                for owner_id, (total, completed) in actual.items()
+                if stored.get(owner_id) != (total, completed)
+            ]
+            self.bulk_create(
+                corrected, update_conflicts=True, unique_fields=['owner'], update_fields=['total', 'completed']
+            )
+        return corrected
+
+class TareaStats(models.Model):
+    """
+    Per-owner tarea counters, archived tareas included, kept in step with
+    every write so that reading them is a single primary-key lookup.
+    """
+    owner = models.OneToOneField(Usuario, on_delete=models.CASCADE, primary_key=True, related_name='tarea_stats')
+    total = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+
+    objects = TareaStatsQuerySet.as_manager()
+
+    @property
+    def pending(self):
+        return self.total - self.completed
+
+    def __str__(self):
+        return f'{self.owner_id}: {self.completed}/{self.total}'
+
+
+class TareaTombstoneQuerySet(models.QuerySet):
+    def record(self, pairs):
+        """
+        Record the deletion of ``(tarea_id, owner_id)`` pairs for the owners'
+        ``tareas/changes``.
+        """
+        now = timezone.now()
+        self.bulk_create(
+            [TareaTombstone(tarea_id=tarea_id, owner_id=owner_id, deleted_at=now)
+             for tarea_id, owner_id in pairs if owner_id is not None],
+            batch_size=1000
+        )
+
+    def prune(self, before, batch_size=1000):
+        """
+        Delete the tombstones recorded before ``before`` in batches of
+        ``batch_size`` and return how many were deleted.
+        """
+        deleted = 0
+        while True:
+            ids = list(self.filter(deleted_at__lt=before).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += self.filter(id__in=ids).delete()[0]
+
+class TareaTombstone(models.Model):
+    """
+    A tarea that was deleted, or moved to another owner, as seen by the owner
+    it left. Kept for ``TAREA_TOMBSTONE_RETENTION_DAYS`` so that syncing
+    clients learn about it.
+    """
+    tarea_id = models.BigIntegerField()
+    owner = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='tarea_tombstones')
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = TareaTombstoneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'deleted_at', 'id'], name='tombstone_owner_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner_id}: {self.tarea_id}'
+
+
+class ArchivedTarea(models.Model):
+    """
+    A completed tarea moved out of ``Tarea`` by ``manage.py archive_tareas``
+    after ``TAREA_ARCHIVE_AFTER_DAYS`` without changes, so that the hot table
+    and its indexes only hold live tareas. Keeps its id and timestamps, and
+    cannot be changed, only deleted: it is only listed, retrieved and deleted
+    with ``?include_archived=1``.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    completed = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    owner = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='archived_tareas', null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = CountedDeleteQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'id'], name='archived_owner_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -0,0 +1,130 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .filters import get_ordering
+
+
+def get_query_params(request):
+    # DRF requests expose query_params; plain Django (async) views use GET.
+    return getattr(request, 'query_params', request.GET)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination over ``(created_at, id)``.
+
+    Pages are fetched with a ``(created_at, id) > cursor`` condition (``<``
+    for ``ordering=-created_at``) instead of an OFFSET, so the database seeks
+    straight to the page through the ``(owner, created_at, id)`` index no
+    matter how deep the client scrolls.
+
+    A list of ``.values()`` querysets with the same columns, such as live and
+    archived tareas, is paged as one: the condition is applied to each and
+    the page is read from their ``UNION ALL``.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.get_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the queryset for the requested page, with one extra row to
+        tell whether there is a next page.
+        """
+        self.request = request
+        params = get_query_params(request)
+        self.page_size = self.get_page_size(params)
+        self.ordering = get_ordering(params)
+        self.descending = self.ordering[0].startswith('-')
+        position = self.decode_cursor(params)
+
+        querysets = queryset if isinstance(queryset, list) else [queryset]
+        if position is not None:
+            querysets = [queryset.filter(self.get_keyset_filter(position)) for queryset in querysets]
+        if len(querysets) > 1:
+            # The parts must not carry their model's default ordering.
+            querysets = [queryset.order_by() for queryset in querysets]
+            queryset = querysets[0].union(*querysets[1:], all=True)
+        else:
+            queryset = querysets[0]
+        return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+    def get_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, params):
+        try:
+            page_size = int(params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_keyset_filter(self, position):
+        # The leading ``created_at >= value`` (or ``<=``) range lets the index
+        # seek to the cursor; the OR only breaks ties between rows created at
+        # the same time.
+        created_at, pk = position
+        if self.descending:
+            return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk))
+        return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return row['created_at'], row['id']
+        return row.created_at, row.id
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        raw = f'{created_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, params):
+        encoded = params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            created_at, pk = raw.split('|')
+            created_at = datetime.fromisoformat(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at.tzinfo is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from gestor_tareas.timing import TimedRendererMixin
+
+
+class NDJSONRenderer(TimedRendererMixin, BaseRenderer):
+    """
+    Newline-delimited JSON. Export responses stream their own rows; this
+    renderer only handles non-streaming payloads such as error responses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items).encode(self.charset)
+
+
+class CSVRenderer(TimedRendererMixin, BaseRenderer):
+    """
+    CSV with a header row. Like ``NDJSONRenderer`` it is only used directly
+    for non-streaming payloads such as error responses.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        if items:
+            writer = csv.DictWriter(buffer, fieldnames=list(items[0]))
+            writer.writeheader()
+            writer.writerows(items)
+        return buffer.getvalue().encode(self.charset)
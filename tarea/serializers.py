@@ -1,15 +1,71 @@
 from rest_framework import serializers
-from .models import Tarea
+from gestor_tareas.timing import TimedListSerializer, TimedSerializerMixin
+from .fields import DEFAULT_FIELDS
+from .models import Tarea, TareaStats
 
-class TareaSerializer(serializers.ModelSerializer):
+class TareaSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Pass ``fields`` to output only those fields (see ``tarea.fields``); the
+    default leaves out ``description_preview``, which must be annotated.
+    """
     owner = serializers.ReadOnlyField(source='owner.username')
+    description_preview = serializers.ReadOnlyField()
     
     class Meta:
         model = Tarea
-        fields = ['id', 'title', 'description', 'completed', 'created_at', 'owner']
-        read_only_fields = ['id', 'created_at', 'owner']
+        fields = ['id', 'title', 'description', 'description_preview', 'completed', 'created_at', 'updated_at', 'owner']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'owner']
+        list_serializer_class = TimedListSerializer
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in set(self.fields).difference(fields or DEFAULT_FIELDS):
+            self.fields.pop(name)
         
     def validate_title(self, value):
         if len(value) < 3:
             raise serializers.ValidationError("Title must be at least 3 characters long.")
-        return value 
\ No newline at end of file
+        return value 
+
+class TareaListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only serializer for the ``.values()`` rows used by list endpoints.
+
+    Every listed tarea belongs to the requesting user, so the owner username
+    is taken once from the serializer context instead of being looked up per
+    row. The output matches ``TareaSerializer``, narrowed to the ``fields`` in
+    the context when there are any.
+    """
+    value_fields = ('id', 'title', 'description', 'completed', 'created_at', 'updated_at')
+    datetime_field = serializers.DateTimeField()
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    def to_representation(self, row):
+        fields = self.context.get('fields')
+        if fields is not None:
+            return {name: self.get_value(row, name) for name in fields}
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'completed': row['completed'],
+            'created_at': self.datetime_field.to_representation(row['created_at']),
+            'updated_at': self.datetime_field.to_representation(row['updated_at']),
+            'owner': self.context['owner'],
+        }
+
+    def get_value(self, row, name):
+        if name == 'owner':
+            return self.context['owner']
+        if name in ('created_at', 'updated_at'):
+            return self.datetime_field.to_representation(row[name])
+        return row[name]
+
+class TareaStatsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    pending = serializers.ReadOnlyField()
+
+    class Meta:
+        model = TareaStats
+        fields = ['total', 'completed', 'pending']
@@ -0,0 +1,98 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Usuario
+from . import cache, events
+from .models import ArchivedTarea, Tarea, TareaStats, TareaTombstone, count_deltas
+
+
+@receiver(post_save, sender=Tarea)
+def invalidate_list_cache_on_save(sender, instance, **kwargs):
+    owner_ids = {instance.owner_id}
+    loaded_values = getattr(instance, '_loaded_values', {})
+    if 'owner_id' in loaded_values:
+        owner_ids.add(loaded_values['owner_id'])
+    cache.invalidate(owner_ids)
+
+
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=ArchivedTarea)
+def invalidate_list_cache_on_delete(sender, instance, **kwargs):
+    cache.invalidate({instance.owner_id})
+
+
+@receiver(post_save, sender=Usuario)
+def invalidate_list_cache_on_owner_save(sender, instance, update_fields, **kwargs):
+    # Cached pages show the owner's username. Logins only touch last_login.
+    if update_fields is None or 'username' in update_fields:
+        cache.invalidate({instance.pk})
+
+
+@receiver(post_save, sender=Tarea)
+def update_stats_on_save(sender, instance, created, update_fields, **kwargs):
+    current = (instance.owner_id, instance.completed)
+    if created:
+        TareaStats.objects.adjust(count_deltas(added=[current]))
+        return
+
+    loaded_values = getattr(instance, '_loaded_values', None)
+    if loaded_values is None:
+        # Saved without being loaded, so the previous values are unknown.
+        TareaStats.objects.recount({instance.owner_id})
+        return
+
+    previous = (
+        loaded_values.get('owner_id', instance.owner_id),
+        loaded_values.get('completed', instance.completed),
+    )
+    if update_fields is not None:
+        # Fields left out of update_fields kept their stored values.
+        current = (
+            current[0] if {'owner', 'owner_id'} & update_fields else previous[0],
+            current[1] if 'completed' in update_fields else previous[1],
+        )
+    if current != previous:
+        TareaStats.objects.adjust(count_deltas(added=[current], removed=[previous]))
+    if current[0] != previous[0]:
+        TareaTombstone.objects.record([(instance.pk, previous[0])])
+
+
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=ArchivedTarea)
+def update_stats_on_delete(sender, instance, origin, **kwargs):
+    # QuerySet.delete() adjusts the counters per owner itself, and deleting
+    # the owner cascades to its TareaStats row.
+    if isinstance(origin, sender):
+        TareaStats.objects.adjust(count_deltas(removed=[(instance.owner_id, instance.completed)]))
+
+
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=ArchivedTarea)
+def record_tombstone_on_delete(sender, instance, origin, **kwargs):
+    # Like the counters: QuerySet.delete() records its own tombstones, and
+    # a deleted owner has no one left to sync.
+    if isinstance(origin, sender):
+        TareaTombstone.objects.record([(instance.pk, instance.owner_id)])
+
+
+@receiver(post_save, sender=Tarea)
+def publish_event_on_save(sender, instance, created, update_fields, **kwargs):
+    loaded_values = getattr(instance, '_loaded_values', {})
+    owner_id = previous_owner_id = loaded_values.get('owner_id', instance.owner_id)
+    if update_fields is None or {'owner', 'owner_id'} & update_fields:
+        owner_id = instance.owner_id
+    published = []
+    if owner_id != previous_owner_id:
+        # Gone from the previous owner's stream, new to the current one's.
+        published.append(events.Event(previous_owner_id, 'deleted', {'id': instance.pk}))
+        created = True
+    published.append(events.Event(owner_id, 'created' if created else 'updated', events.tarea_data(instance)))
+    events.publish_on_commit(published, using=kwargs.get('using'))
+
+
+@receiver(post_delete, sender=Tarea)
+@receiver(post_delete, sender=ArchivedTarea)
+def publish_event_on_delete(sender, instance, origin, using, **kwargs):
+    # QuerySet.delete() publishes its own events.
+    if isinstance(origin, sender):
+        events.publish_on_commit([events.Event(instance.owner_id, 'deleted', {'id': instance.pk})], using=using)
@@ -0,0 +1,117 @@
+"""
+Delta sync for ``tareas/changes``.
+
+A sync cursor holds two keyset positions: ``(updated_at, id)`` of the last
+changed tarea and ``(deleted_at, id)`` of the last tombstone handed to the
+client. Each call returns the tareas and tombstones after those positions
+through the ``(owner, updated_at, id)`` and ``(owner, deleted_at, id)``
+indexes, so a poll costs nothing when nothing changed.
+
+Timestamps are taken before commit, so a slow transaction can commit a
+change that sorts before a position already handed out. Once a client has
+caught up, its cursor is therefore moved back to ``TAREA_SYNC_LAG_SECONDS``
+ago: the next call repeats the changes of that window, which clients apply
+idempotently, instead of missing one.
+
+Tombstones are pruned after ``TAREA_TOMBSTONE_RETENTION_DAYS``; a cursor
+older than that could have missed deletions and is rejected.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+
+from .models import Tarea, TareaTombstone
+from .serializers import TareaListSerializer
+
+
+class ExpiredCursor(Exception):
+    pass
+
+
+def get_lag():
+    return timedelta(seconds=getattr(settings, 'TAREA_SYNC_LAG_SECONDS', 5))
+
+
+def get_retention():
+    return timedelta(days=getattr(settings, 'TAREA_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def encode_cursor(changed, deleted):
+    raw = json.dumps([
+        [changed[0].isoformat(), changed[1]] if changed else None,
+        [deleted[0].isoformat(), deleted[1]],
+    ])
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """
+    Return the ``(changed, deleted)`` positions of a cursor; ``changed`` is
+    ``None`` until the first tarea has been returned.
+    """
+    try:
+        changed, deleted = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        positions = [
+            (datetime.fromisoformat(position[0]), int(position[1])) if position is not None else None
+            for position in (changed, deleted)
+        ]
+    except (TypeError, ValueError, UnicodeError, binascii.Error, IndexError):
+        raise NotFound('Invalid cursor')
+    if positions[1] is None or any(position and position[0].tzinfo is None for position in positions):
+        raise NotFound('Invalid cursor')
+    return positions
+
+
+def after(position, timestamp_field):
+    if position is None:
+        return Q()
+    timestamp, pk = position
+    return Q(**{f'{timestamp_field}__gte': timestamp}) & (
+        Q(**{f'{timestamp_field}__gt': timestamp}) | Q(id__gt=pk)
+    )
+
+
+def get_changes(owner, cursor, page_size):
+    """
+    Return ``(rows, deleted_ids, next_cursor, has_more)`` for ``owner``.
+
+    Without a cursor every tarea is a change and only deletions from now on
+    are reported. ``rows`` are ``.values()`` dicts for ``TareaListSerializer``.
+    """
+    now = timezone.now()
+    if cursor:
+        changed, deleted = decode_cursor(cursor)
+        if deleted[0] < now - get_retention():
+            raise ExpiredCursor
+    else:
+        changed, deleted = None, (now, 0)
+
+    rows = list(
+        Tarea.objects.filter(after(changed, 'updated_at'), owner=owner)
+        .order_by('updated_at', 'id').values(*TareaListSerializer.value_fields)[:page_size + 1]
+    )
+    # A tarea moved away and back again is a change, not a deletion.
+    tombstones = list(
+        TareaTombstone.objects.filter(after(deleted, 'deleted_at'), owner=owner)
+        .exclude(Exists(Tarea.objects.filter(owner=owner, id=OuterRef('tarea_id'))))
+        .order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'tarea_id')[:page_size + 1]
+    )
+
+    has_more = len(rows) > page_size or len(tombstones) > page_size
+    rows, tombstones = rows[:page_size], tombstones[:page_size]
+    if rows:
+        changed = (rows[-1]['updated_at'], rows[-1]['id'])
+    if tombstones:
+        deleted = tombstones[-1][:2]
+    if not has_more:
+        horizon = (now - get_lag(), 0)
+        if changed is not None and changed > horizon:
+            changed = horizon
+        deleted = min(deleted, horizon)
+    return rows, [tarea_id for _, _, tarea_id in tombstones], encode_cursor(changed, deleted), has_more
@@ -1,13 +1,38 @@
+from django.contrib.postgres.search import SearchQuery
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from tempfile import NamedTemporaryFile
+from unittest import skipUnless
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
-from rest_framework.test import APIClient, APITestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 from users.models import Usuario
-from .models import Tarea
+from . import cache as list_cache
+from .events import OVERFLOW, Broker, Event, InProcessBackend
+from .fields import PREVIEW_LENGTH
+from .models import SEARCH_CONFIG, ArchivedTarea, Tarea, TareaStats, TareaTombstone
+from .sync import encode_cursor
+from .views import TareaListView
+import asyncio
 import json
 
 class TareaTests(APITestCase):
     def setUp(self):
+        cache.clear()
+        
         # Create test users
         self.user1 = Usuario.objects.create_user(
             username='testuser1',
@@ -58,9 +83,10 @@ class TareaTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Check that only user1's tareas are returned
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]['title'], 'Test Tarea 1')
-        self.assertEqual(response.data[1]['title'], 'Test Tarea 2')
+        results = response.data['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['title'], 'Test Tarea 1')
+        self.assertEqual(results[1]['title'], 'Test Tarea 2')
     
     def test_create_tarea(self):
         """Test creating a new tarea"""
@@ -261,9 +287,10 @@ class TareaTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Check that only completed tareas are returned
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['title'], 'Test Tarea 2')
-        self.assertTrue(response.data[0]['completed'])
+        results = response.data['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['title'], 'Test Tarea 2')
+        self.assertTrue(results[0]['completed'])
     
     def test_detail_tarea(self):
         """Test retrieving a specific tarea"""
@@ -295,3 +322,1403 @@ class TareaTests(APITestCase):
         
         # Check that access was denied (404 because the queryset filters by owner)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_tareas_query_count_is_constant(self):
+        """Test that listing tareas does not run one query per row"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        # Count queries with the two tareas from setUp
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('tarea-list'))
+        
+        # Add more tareas and count again
+        Tarea.objects.bulk_create([
+            Tarea(title=f'Bulk Tarea {i}', owner=self.user1) for i in range(20)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('tarea-list'))
+        
+        # Check that the number of queries did not grow with the rows
+        self.assertEqual(len(response.data['results']), 22)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(response.data['results'][0]['owner'], 'testuser1')
+    
+    def test_filter_completed_query_count_is_constant(self):
+        """Test that filtering completed tareas does not run one query per row"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        # Count queries with the single completed tarea from setUp
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('tarea-filter-completed'))
+        
+        # Add more completed tareas and count again
+        Tarea.objects.bulk_create([
+            Tarea(title=f'Bulk Tarea {i}', completed=True, owner=self.user1) for i in range(20)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('tarea-filter-completed'))
+        
+        # Check that the number of queries did not grow with the rows
+        self.assertEqual(len(response.data['results']), 21)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(response.data['results'][0]['owner'], 'testuser1')
+    
+    def test_list_tareas_cursor_pagination(self):
+        """Test walking the tarea list page by page with the cursor"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        # Create tareas that all share the same created_at
+        Tarea.objects.bulk_create([
+            Tarea(title=f'Bulk Tarea {i}', owner=self.user1) for i in range(5)
+        ])
+        Tarea.objects.filter(owner=self.user1).update(created_at=self.tarea1.created_at)
+        
+        # Follow the next links two tareas at a time
+        seen = []
+        url = reverse('tarea-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(tarea['id'] for tarea in response.data['results'])
+            url = response.data['next']
+        
+        # Check that every tarea was returned exactly once, in order
+        expected = list(Tarea.objects.filter(owner=self.user1).order_by('created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_list_tareas_deep_page_query_count(self):
+        """Test that a deep page costs the same number of queries as the first"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        Tarea.objects.bulk_create([
+            Tarea(title=f'Bulk Tarea {i}', owner=self.user1) for i in range(20)
+        ])
+        
+        # Count queries for the first page
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(reverse('tarea-list') + '?page_size=5')
+        
+        # Jump a few pages ahead and count again
+        for _ in range(3):
+            next_url = response.data['next']
+            with CaptureQueriesContext(connection) as deep:
+                response = self.client.get(next_url)
+        
+        # Check that the page was fetched without an OFFSET
+        self.assertEqual(len(deep.captured_queries), len(first.captured_queries))
+        self.assertNotIn('OFFSET', deep.captured_queries[-1]['sql'].upper())
+        self.assertEqual(len(response.data['results']), 5)
+    
+    def test_list_tareas_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list') + '?cursor=not-a-cursor')
+        
+        # Check that the cursor was rejected
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_list_tareas_filter_completed_false(self):
+        """Test filtering the list by pending tareas"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list') + '?completed=false')
+        
+        # Check that only the pending tarea is returned
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [tarea['title'] for tarea in response.data['results']]
+        self.assertEqual(titles, ['Test Tarea 1'])
+    
+    def test_list_tareas_filter_created_range_and_title(self):
+        """Test filtering the list by creation date range and title prefix"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        # Move tarea1 a week into the past
+        Tarea.objects.filter(id=self.tarea1.id).update(created_at=self.tarea1.created_at - timedelta(days=7))
+        Tarea.objects.create(title='Groceries', owner=self.user1)
+        
+        since = (self.tarea2.created_at - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('tarea-list'), {'created_after': since, 'title': 'Test'})
+        
+        # Check that only tareas inside the range with the prefix are returned
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [tarea['title'] for tarea in response.data['results']]
+        self.assertEqual(titles, ['Test Tarea 2'])
+    
+    def test_list_tareas_descending_ordering(self):
+        """Test ordering the list newest first across pages"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        Tarea.objects.create(title='Test Tarea 4', owner=self.user1)
+        
+        # Follow the next links one tarea at a time
+        titles = []
+        url = reverse('tarea-list') + '?ordering=-created_at&page_size=1'
+        while url:
+            response = self.client.get(url)
+            titles.extend(tarea['title'] for tarea in response.data['results'])
+            url = response.data['next']
+        
+        # Check that the tareas come newest first
+        self.assertEqual(titles, ['Test Tarea 4', 'Test Tarea 2', 'Test Tarea 1'])
+    
+    def test_list_tareas_invalid_filters(self):
+        """Test that unsupported filter values are rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        for params in ({'completed': 'maybe'}, {'created_after': 'yesterday'}, {'ordering': 'title'}):
+            response = self.client.get(reverse('tarea-list'), params)
+            
+            # Check that the request was rejected
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    
+    def test_list_tareas_cache_hit(self):
+        """Test that a repeated list request is served from the cache"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        first = self.client.get(reverse('tarea-list'))
+        
+        # Check that the second request does not touch the database
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('tarea-list'))
+        
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(list_cache.get_stats(), {'hits': 1, 'misses': 1})
+    
+    def test_list_tareas_cache_is_per_user_and_query(self):
+        """Test that cached pages are not shared across users or query strings"""
+        self.client.force_authenticate(user=self.user1)
+        self.client.get(reverse('tarea-list'))
+        
+        # A different query string is a different page
+        response = self.client.get(reverse('tarea-list') + '?completed=true')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+        
+        # A different user never sees user1's page
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(reverse('tarea-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([tarea['title'] for tarea in response.data['results']], ['Test Tarea 3'])
+    
+    def test_list_tareas_cache_invalidation(self):
+        """Test that every kind of write invalidates the cached list"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        writes = [
+            lambda: Tarea.objects.create(title='Created Tarea', owner=self.user1),
+            lambda: Tarea.objects.filter(id=self.tarea1.id).update(title='Updated Tarea'),
+            lambda: Tarea.objects.bulk_create([Tarea(title='Bulk Tarea', owner=self.user1)]),
+            lambda: Tarea.objects.bulk_update([Tarea(id=self.tarea2.id, title='Bulk Updated', owner=self.user1)], ['title']),
+            lambda: Tarea.objects.get(id=self.tarea1.id).delete(),
+            lambda: Tarea.objects.filter(owner=self.user1).delete(),
+        ]
+        for write in writes:
+            self.client.get(reverse('tarea-list'))
+            write()
+            response = self.client.get(reverse('tarea-list'))
+            
+            # Check that the list was rebuilt from the database
+            self.assertEqual(response['X-Cache'], 'MISS')
+            expected = list(Tarea.objects.filter(owner=self.user1).values_list('title', flat=True))
+            self.assertEqual([tarea['title'] for tarea in response.data['results']], expected)
+    
+    def test_list_tareas_cache_invalidation_on_owner_change(self):
+        """Test that moving a tarea to another user invalidates both lists"""
+        for user in (self.user1, self.user2):
+            self.client.force_authenticate(user=user)
+            self.client.get(reverse('tarea-list'))
+        
+        self.client.force_authenticate(user=self.user2)
+        
+        # Reassign tarea1 to user2, as the admin would
+        tarea = Tarea.objects.get(id=self.tarea1.id)
+        tarea.owner = self.user2
+        tarea.save()
+        
+        response = self.client.get(reverse('tarea-list'))
+        self.assertEqual(len(response.data['results']), 2)
+        
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(reverse('tarea-list'))
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_list_tareas_cache_invalidation_on_rename(self):
+        """Test that renaming the owner invalidates the cached list and its ETag"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        etag = self.client.get(reverse('tarea-list'))['ETag']
+        
+        self.user1.username = 'renameduser1'
+        self.user1.save()
+        
+        response = self.client.get(reverse('tarea-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual({tarea['owner'] for tarea in response.data['results']}, {'renameduser1'})
+        
+        # Check that a login alone keeps the cache
+        self.user1.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(reverse('tarea-list'))['X-Cache'], 'HIT')
+    
+    def test_list_tareas_not_modified(self):
+        """Test that an unchanged list answers If-None-Match with 304"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list'))
+        etag = response['ETag']
+        
+        # Check that revalidating returns an empty 304
+        response = self.client.get(reverse('tarea-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        
+        # Check that a change produces a new ETag
+        Tarea.objects.filter(id=self.tarea1.id).update(title='Changed Tarea')
+        response = self.client.get(reverse('tarea-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_list_tareas_etag_needs_no_aggregate(self):
+        """Test that the list ETag comes from the cache version, not a scan of the tareas"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tarea-list'), {'page_size': 1})
+        self.assertIn('ETag', response)
+        
+        # Check that the page query is the only one on the tareas
+        tarea_queries = [query['sql'] for query in queries.captured_queries if 'tarea_tarea' in query['sql']]
+        self.assertEqual(len(tarea_queries), 1)
+        self.assertIn('LIMIT 2', tarea_queries[0])
+    
+    def test_list_tareas_not_modified_after_delete(self):
+        """Test that deleting a tarea changes the list ETag"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        etag = self.client.get(reverse('tarea-list'))['ETag']
+        self.tarea1.delete()
+        
+        response = self.client.get(reverse('tarea-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_list_tareas_ignores_if_modified_since(self):
+        """Test that a list never answers If-Modified-Since with a stale 304"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list'))
+        self.assertNotIn('Last-Modified', response)
+        
+        # Deleting an older tarea leaves the newest updated_at as it was
+        self.tarea1.delete()
+        response = self.client.get(
+            reverse('tarea-list'), HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp() + 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea2.id])
+    
+    def test_detail_tarea_not_modified(self):
+        """Test that an unchanged tarea answers conditional requests with 304"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        url = reverse('tarea-detail', kwargs={'pk': self.tarea1.id})
+        response = self.client.get(url)
+        self.assertIn('updated_at', response.data)
+        
+        # Check both validators
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detail_tarea_etag_per_representation(self):
+        """Test that sparse fields and include_archived get their own ETag"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        url = reverse('tarea-detail', kwargs={'pk': self.tarea1.id})
+        etag = self.client.get(url)['ETag']
+        sparse_etag = self.client.get(url, {'fields': 'id,title'})['ETag']
+        self.assertNotEqual(sparse_etag, etag)
+        self.assertNotEqual(self.client.get(url, {'include_archived': '1'})['ETag'], etag)
+        
+        # Check that the full ETag does not revalidate the sparse response
+        response = self.client.get(url, {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        # Check that the fields are normalized
+        response = self.client.get(url, {'fields': 'title, id'}, HTTP_IF_NONE_MATCH=sparse_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_update_refreshes_updated_at(self):
+        """Test that single and bulk updates move updated_at forward"""
+        before = self.tarea1.updated_at
+        
+        Tarea.objects.filter(id=self.tarea1.id).update(completed=True)
+        self.tarea1.refresh_from_db()
+        self.assertGreater(self.tarea1.updated_at, before)
+        
+        before = self.tarea1.updated_at
+        self.tarea1.title = 'Bulk Updated Tarea'
+        Tarea.objects.bulk_update([self.tarea1], ['title'])
+        self.tarea1.refresh_from_db()
+        self.assertGreater(self.tarea1.updated_at, before)
+    
+    def test_bulk_operations(self):
+        """Test creating, updating and deleting tareas in one request"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        data = {
+            'operations': [
+                {'op': 'create', 'data': {'title': 'Bulk Created', 'completed': True}},
+                {'op': 'update', 'id': self.tarea1.id, 'data': {'completed': True}},
+                {'op': 'delete', 'id': self.tarea2.id},
+            ]
+        }
+        
+        response = self.client.post(reverse('tarea-bulk'), data, format='json')
+        
+        # Check the per-item results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 200, 204])
+        self.assertEqual(results[0]['data']['owner'], 'testuser1')
+        self.assertTrue(results[1]['data']['completed'])
+        
+        # Check that every operation was applied
+        self.assertTrue(Tarea.objects.filter(title='Bulk Created', owner=self.user1).exists())
+        self.tarea1.refresh_from_db()
+        self.assertTrue(self.tarea1.completed)
+        self.assertFalse(Tarea.objects.filter(id=self.tarea2.id).exists())
+    
+    def test_bulk_operations_are_all_or_nothing(self):
+        """Test that one invalid operation prevents all the others"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        data = {
+            'operations': [
+                {'op': 'create', 'data': {'title': 'Valid Title'}},
+                {'op': 'create', 'data': {'title': 'AB'}},
+                {'op': 'update', 'id': self.tarea1.id, 'data': {'owner': 'testuser2'}},
+                {'op': 'delete', 'id': self.tarea3.id},
+                {'op': 'delete', 'id': self.tarea2.id},
+            ]
+        }
+        
+        response = self.client.post(reverse('tarea-bulk'), data, format='json')
+        
+        # Check that the invalid items are reported and the rest were skipped
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [424, 400, 400, 404, 424])
+        self.assertIn('title', results[1]['errors'])
+        self.assertIn('Invalid fields: owner', results[2]['error'])
+        
+        # Check that nothing was written, including user2's tarea
+        self.assertEqual(Tarea.objects.count(), 3)
+    
+    def test_bulk_operations_reject_boolean_ids(self):
+        """Test that JSON booleans are not taken for tarea ids"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        Tarea.objects.filter(pk=1).delete()
+        Tarea.objects.create(id=1, title='First Tarea', owner=self.user1)
+        
+        data = {'operations': [{'op': 'delete', 'id': True}, {'op': 'update', 'id': False, 'data': {'completed': True}}]}
+        response = self.client.post(reverse('tarea-bulk'), data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in response.data['results']], [404, 404])
+        self.assertTrue(Tarea.objects.filter(pk=1).exists())
+    
+    def test_bulk_operations_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the operations"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        def run(count):
+            tareas = Tarea.objects.bulk_create([
+                Tarea(title=f'Bulk Tarea {i}', owner=self.user1) for i in range(count * 2)
+            ])
+            operations = (
+                [{'op': 'create', 'data': {'title': f'New Tarea {i}'}} for i in range(count)]
+                + [{'op': 'update', 'id': tarea.id, 'data': {'completed': True}} for tarea in tareas[:count]]
+                + [{'op': 'delete', 'id': tarea.id} for tarea in tareas[count:]]
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('tarea-bulk'), {'operations': operations}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries.captured_queries)
+        
+        self.assertEqual(run(2), run(20))
+    
+    def test_bulk_operations_limit(self):
+        """Test that oversized and empty batches are rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        operations = [{'op': 'create', 'data': {'title': 'Too Many'}}] * 1001
+        response = self.client.post(reverse('tarea-bulk'), {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(reverse('tarea-bulk'), {'operations': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tarea.objects.count(), 3)
+    
+    def test_detail_many_tareas(self):
+        """Test retrieving several tareas by id in one request"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        ids = f'{self.tarea2.id},{self.tarea3.id},{self.tarea1.id},999999'
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tarea-detail-many'), {'ids': ids})
+        
+        # Check that own tareas come back in request order and the rest are missing
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea2.id, self.tarea1.id])
+        self.assertEqual(response.data['missing'], [self.tarea3.id, 999999])
+        
+        # Check that the items match the single detail endpoint
+        detail = self.client.get(reverse('tarea-detail', kwargs={'pk': self.tarea1.id}))
+        self.assertEqual(response.data['results'][1], detail.data)
+    
+    def test_detail_many_tareas_invalid_ids(self):
+        """Test that missing, malformed and oversized id lists are rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        too_many = ','.join(str(i) for i in range(1, 102))
+        for params in ({}, {'ids': '1,abc'}, {'ids': too_many}):
+            response = self.client.get(reverse('tarea-detail-many'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_tareas_ndjson(self):
+        """Test streaming the user's tareas as NDJSON"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-export'))
+        
+        # Check that each line is one of user1's tareas, as the list returns it
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        exported = [json.loads(line) for line in lines]
+        listed = self.client.get(reverse('tarea-list')).data['results']
+        self.assertEqual(exported, [dict(tarea) for tarea in listed])
+    
+    def test_export_tareas_csv(self):
+        """Test streaming the user's completed tareas as CSV"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-export'), {'format': 'csv', 'completed': 'true'})
+        
+        # Check the header and the single completed tarea
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'id,title,description,completed,created_at,updated_at,owner')
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f'{self.tarea2.id},Test Tarea 2,Test Description 2,True,'))
+    
+    def test_import_tareas_ndjson(self):
+        """Test importing tareas from NDJSON with some invalid rows"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        content = '\n'.join([
+            '{"title": "Imported 1", "completed": true}',
+            '{"title": "AB"}',
+            'not json',
+            '',
+            '{"title": "Imported 2", "description": "From another tool", "owner": "testuser2"}',
+        ]).encode('utf-8')
+        upload = SimpleUploadedFile('tareas.ndjson', content)
+        
+        response = self.client.post(reverse('tarea-import'), {'file': upload, 'batch_size': 1}, format='multipart')
+        
+        # Check the report
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 3])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        
+        # Check that the valid rows belong to user1 whatever the file says
+        imported = Tarea.objects.filter(title__startswith='Imported')
+        self.assertEqual(imported.count(), 2)
+        self.assertEqual(set(imported.values_list('owner', flat=True)), {self.user1.id})
+    
+    def test_import_tareas_csv(self):
+        """Test importing tareas from a CSV upload"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        content = 'title,description,completed\nImported 1,"Two\nlines",true\nAB,,false\nImported 2,,\n'
+        upload = SimpleUploadedFile('tareas.csv', content.encode('utf-8'))
+        
+        response = self.client.post(reverse('tarea-import'), {'file': upload}, format='multipart')
+        
+        # Check that the short title on line 4 was the only failure
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [4])
+        self.assertEqual(Tarea.objects.get(title='Imported 1').description, 'Two\nlines')
+    
+    def test_import_tareas_command(self):
+        """Test importing tareas from a file with the management command"""
+        with NamedTemporaryFile('w', suffix='.ndjson', delete=False) as handle:
+            handle.write('{"title": "Command Tarea"}\n{"title": ""}\n')
+        
+        out, err = StringIO(), StringIO()
+        call_command('import_tareas', handle.name, owner='testuser2', batch_size=10, stdout=out, stderr=err)
+        
+        # Check the summary and the per-row error
+        self.assertIn('Imported 1 tareas, 1 rows failed', out.getvalue())
+        self.assertIn('line 2:', err.getvalue())
+        self.assertEqual(Tarea.objects.get(title='Command Tarea').owner, self.user2)
+    
+    def test_search_tareas_requires_query(self):
+        """Test that searching without a query is rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-search'), {'q': '  '})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_stats_tareas(self):
+        """Test reading the tarea counters with a single query"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tarea-stats'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'total': 2, 'completed': 1, 'pending': 1})
+    
+    def test_stats_tareas_without_tareas(self):
+        """Test that a user without tareas gets zero counts"""
+        user = Usuario.objects.create_user(username='emptyuser', email='empty@example.com', password='emptypassword')
+        self.client.force_authenticate(user=user)
+        
+        response = self.client.get(reverse('tarea-stats'))
+        
+        self.assertEqual(response.data, {'total': 0, 'completed': 0, 'pending': 0})
+    
+    def test_stats_follow_single_writes(self):
+        """Test that create, completion toggles and delete update the counters"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        self.client.post(reverse('tarea-create'), {'title': 'New Tarea'})
+        self.client.patch(reverse('tarea-update', kwargs={'pk': self.tarea1.id}), {'completed': True})
+        self.client.patch(reverse('tarea-update', kwargs={'pk': self.tarea1.id}), {'title': 'Renamed'})
+        self.client.delete(reverse('tarea-delete', kwargs={'pk': self.tarea2.id}))
+        
+        # Check the counters and that nothing drifted
+        response = self.client.get(reverse('tarea-stats'))
+        self.assertEqual(response.data, {'total': 2, 'completed': 1, 'pending': 1})
+        self.assertEqual(TareaStats.objects.recount(), [])
+    
+    def test_stats_follow_bulk_writes(self):
+        """Test that the bulk endpoint and queryset bulk writes update the counters"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        self.client.post(reverse('tarea-bulk'), {'operations': [
+            {'op': 'create', 'data': {'title': 'Bulk Created', 'completed': True}},
+            {'op': 'update', 'id': self.tarea1.id, 'data': {'completed': True}},
+            {'op': 'delete', 'id': self.tarea2.id},
+        ]}, format='json')
+        self.assertEqual(TareaStats.objects.get(owner=self.user1).completed, 2)
+        
+        Tarea.objects.bulk_create([Tarea(title=f'Bulk {i}', owner=self.user2) for i in range(3)])
+        Tarea.objects.filter(owner=self.user1).update(completed=False)
+        Tarea.objects.filter(pk=self.tarea1.pk).update(owner=self.user2)
+        Tarea.objects.filter(title__startswith='Bulk ').delete()
+        self.tarea3.owner, self.tarea3.completed = self.user1, True
+        Tarea.objects.bulk_update([self.tarea3], ['owner', 'completed'])
+        
+        # Check that the counters match a recount
+        self.assertEqual(TareaStats.objects.recount(), [])
+        stats = TareaStats.objects.get(owner=self.user2)
+        self.assertEqual((stats.total, stats.completed), (1, 0))
+        
+        # Check that deleting the owner removes its counters
+        self.user2.delete()
+        self.assertFalse(TareaStats.objects.filter(owner_id=self.user2.id).exists())
+    
+    def test_single_writes_lock_the_row(self):
+        """Test that update and delete read the row they count from with a lock"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        locked = []
+        select_for_update = QuerySet.select_for_update
+        def record(queryset, *args, **kwargs):
+            locked.append((queryset.model, transaction.get_connection().in_atomic_block))
+            return select_for_update(queryset, *args, **kwargs)
+        
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=record):
+            self.client.patch(
+                reverse('tarea-update', kwargs={'pk': self.tarea1.id}), {'completed': True}, format='json'
+            )
+            self.client.delete(reverse('tarea-delete', kwargs={'pk': self.tarea1.id}))
+        
+        self.assertEqual(locked, [(Tarea, True), (Tarea, True)])
+        self.assertEqual(TareaStats.objects.recount(), [])
+    
+    def test_repair_tarea_stats_command(self):
+        """Test that the repair command finds and fixes drifted counters"""
+        TareaStats.objects.filter(owner=self.user1).update(total=99)
+        
+        out = StringIO()
+        call_command('repair_tarea_stats', dry_run=True, stdout=out)
+        self.assertIn('1 counter rows would be repaired', out.getvalue())
+        self.assertEqual(TareaStats.objects.get(owner=self.user1).total, 99)
+        
+        out = StringIO()
+        call_command('repair_tarea_stats', stdout=out)
+        self.assertIn('owner %d: total=2 completed=1' % self.user1.id, out.getvalue())
+        self.assertEqual(TareaStats.objects.get(owner=self.user1).total, 2)
+    
+    def test_list_tareas_sparse_fields(self):
+        """Test that ?fields narrows the output and the selected columns"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tarea-list'), {'fields': 'id,title,completed'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': self.tarea1.id, 'title': 'Test Tarea 1', 'completed': False})
+        
+        # Check that the description was never selected
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertIn('"title"', page_query)
+        self.assertNotIn('"description"', page_query)
+    
+    def test_list_tareas_description_preview(self):
+        """Test that description_preview is cut to PREVIEW_LENGTH in SQL"""
+        self.tarea1.description = 'x' * (PREVIEW_LENGTH + 50)
+        self.tarea1.save()
+        
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list'), {'fields': 'title,description_preview'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'title': 'Test Tarea 1', 'description_preview': 'x' * PREVIEW_LENGTH})
+        
+        # Check that pagination still works without id and created_at in the output
+        response = self.client.get(reverse('tarea-list'), {'fields': 'title', 'page_size': 1})
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'title': 'Test Tarea 2'}])
+    
+    def test_filter_completed_sparse_fields(self):
+        """Test that the completed filter view accepts ?fields"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-filter-completed'), {'fields': 'id,owner'})
+        
+        self.assertEqual(response.data['results'], [{'id': self.tarea2.id, 'owner': 'testuser1'}])
+    
+    def test_detail_tarea_sparse_fields(self):
+        """Test that the detail view defers the columns not requested"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('tarea-detail', kwargs={'pk': self.tarea1.id}),
+                {'fields': 'title,description_preview'}
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'title': 'Test Tarea 1', 'description_preview': 'Test Description 1'})
+        self.assertIn('ETag', response)
+        detail_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"completed"', detail_query)
+        self.assertIn('SUBSTR(', detail_query.upper())
+        
+        # Check that the owner is still joined when requested
+        response = self.client.get(reverse('tarea-detail', kwargs={'pk': self.tarea1.id}), {'fields': 'owner'})
+        self.assertEqual(response.data, {'owner': 'testuser1'})
+    
+    @override_settings(TAREA_SYNC_LAG_SECONDS=0)
+    def test_changes_tareas(self):
+        """Test that changes returns only what changed since the cursor"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        # Initial sync returns every tarea
+        response = self.client.get(reverse('tarea-changes'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['changes']], [self.tarea1.id, self.tarea2.id])
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        cursor = response.data['next']
+        
+        # Check that nothing is returned when nothing changed
+        response = self.client.get(reverse('tarea-changes'), {'since': cursor})
+        self.assertEqual((response.data['changes'], response.data['deleted']), ([], []))
+        
+        # Update one tarea and delete the other
+        self.client.patch(
+            reverse('tarea-update', kwargs={'pk': self.tarea1.id}), {'completed': True}, format='json'
+        )
+        self.client.delete(reverse('tarea-delete', kwargs={'pk': self.tarea2.id}))
+        
+        response = self.client.get(reverse('tarea-changes'), {'since': response.data['next']})
+        self.assertEqual([row['id'] for row in response.data['changes']], [self.tarea1.id])
+        self.assertTrue(response.data['changes'][0]['completed'])
+        self.assertEqual(response.data['deleted'], [self.tarea2.id])
+    
+    @override_settings(TAREA_SYNC_LAG_SECONDS=0)
+    def test_changes_tareas_bulk_and_moved(self):
+        """Test that queryset deletes and owner changes leave tombstones"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        cursor = self.client.get(reverse('tarea-changes')).data['next']
+        
+        Tarea.objects.filter(pk=self.tarea1.pk).update(owner=self.user2)
+        Tarea.objects.filter(pk=self.tarea2.pk).delete()
+        
+        response = self.client.get(reverse('tarea-changes'), {'since': cursor})
+        self.assertEqual(response.data['changes'], [])
+        self.assertEqual(sorted(response.data['deleted']), [self.tarea1.id, self.tarea2.id])
+        
+        # Check that a tarea moved back is a change again, not a deletion
+        Tarea.objects.filter(pk=self.tarea1.pk).update(owner=self.user1)
+        response = self.client.get(reverse('tarea-changes'), {'since': cursor})
+        self.assertEqual([row['id'] for row in response.data['changes']], [self.tarea1.id])
+        self.assertEqual(response.data['deleted'], [self.tarea2.id])
+    
+    def test_changes_tareas_pagination(self):
+        """Test that changes are paged with has_more"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-changes'), {'page_size': 1})
+        self.assertEqual([row['id'] for row in response.data['changes']], [self.tarea1.id])
+        self.assertTrue(response.data['has_more'])
+        
+        response = self.client.get(reverse('tarea-changes'), {'page_size': 1, 'since': response.data['next']})
+        self.assertEqual([row['id'] for row in response.data['changes']], [self.tarea2.id])
+        self.assertFalse(response.data['has_more'])
+    
+    def test_changes_tareas_repeats_lag_window(self):
+        """Test that a caught-up cursor re-reads the last TAREA_SYNC_LAG_SECONDS"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        cursor = self.client.get(reverse('tarea-changes')).data['next']
+        response = self.client.get(reverse('tarea-changes'), {'since': cursor})
+        
+        self.assertEqual(len(response.data['changes']), 2)
+    
+    def test_changes_tareas_expired_cursor(self):
+        """Test that a cursor older than the tombstone retention is rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        old = timezone.now() - timedelta(days=settings.TAREA_TOMBSTONE_RETENTION_DAYS + 1)
+        response = self.client.get(reverse('tarea-changes'), {'since': encode_cursor(None, (old, 0))})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        
+        response = self.client.get(reverse('tarea-changes'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_prune_tarea_tombstones_command(self):
+        """Test that tombstones past the retention are pruned"""
+        old_id, recent_id = self.tarea1.id, self.tarea2.id
+        self.tarea1.delete()
+        self.tarea2.delete()
+        TareaTombstone.objects.filter(tarea_id=old_id).update(deleted_at=timezone.now() - timedelta(days=31))
+        
+        out = StringIO()
+        call_command('prune_tarea_tombstones', days=30, batch_size=1, stdout=out)
+        
+        self.assertIn('1 tombstones pruned', out.getvalue())
+        self.assertEqual(list(TareaTombstone.objects.values_list('tarea_id', flat=True)), [recent_id])
+    
+    def archive(self, *tareas):
+        """Make the given tareas completed a year ago and archive them"""
+        old = timezone.now() - timedelta(days=365)
+        Tarea.objects.filter(pk__in=[tarea.pk for tarea in tareas]).update(completed=True, updated_at=old)
+        call_command('archive_tareas', days=30, stdout=StringIO())
+    
+    def test_archive_tareas_command(self):
+        """Test that old completed tareas move to the archive in batches"""
+        old = timezone.now() - timedelta(days=365)
+        Tarea.objects.filter(pk=self.tarea2.pk).update(updated_at=old)
+        Tarea.objects.filter(pk=self.tarea3.pk).update(completed=True, updated_at=old)
+        # Check that old pending tareas stay
+        Tarea.objects.filter(pk=self.tarea1.pk).update(updated_at=old)
+        
+        out = StringIO()
+        call_command('archive_tareas', days=30, batch_size=1, stdout=out)
+        
+        self.assertIn('2 tareas archived', out.getvalue())
+        self.assertEqual(list(Tarea.objects.values_list('id', flat=True)), [self.tarea1.id])
+        archived = ArchivedTarea.objects.get(pk=self.tarea2.id)
+        self.assertEqual((archived.title, archived.owner, archived.updated_at), ('Test Tarea 2', self.user1, old))
+        self.assertEqual(ArchivedTarea.objects.filter(pk=self.tarea3.id).count(), 1)
+        
+        # Check that the counters still include the archived tareas and agree with a recount
+        stats = TareaStats.objects.get(owner=self.user1)
+        self.assertEqual((stats.total, stats.completed), (2, 1))
+        self.assertEqual(TareaStats.objects.recount(), [])
+        
+        # Check that archived tareas leave the synced list like deleted ones
+        self.assertEqual(
+            sorted(TareaTombstone.objects.values_list('tarea_id', flat=True)), [self.tarea2.id, self.tarea3.id]
+        )
+        
+        # Check that running it again has nothing left to do
+        out = StringIO()
+        call_command('archive_tareas', days=30, stdout=out)
+        self.assertIn('0 tareas archived', out.getvalue())
+    
+    def test_list_tareas_include_archived(self):
+        """Test that archived tareas are only listed with include_archived"""
+        self.archive(self.tarea1)
+        
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list'))
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea2.id])
+        
+        response = self.client.get(reverse('tarea-list'), {'include_archived': '1', 'ordering': '-created_at'})
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea2.id, self.tarea1.id])
+        self.assertEqual(response.data['results'][1]['owner'], 'testuser1')
+        
+        # Check that pages run across both tables
+        response = self.client.get(reverse('tarea-list'), {'include_archived': 'true', 'page_size': 1})
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea1.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea2.id])
+        self.assertIsNone(response.data['next'])
+        
+        response = self.client.get(reverse('tarea-list'), {'include_archived': '1', 'fields': 'title'})
+        self.assertEqual(response.data['results'], [{'title': 'Test Tarea 1'}, {'title': 'Test Tarea 2'}])
+        
+        response = self.client.get(reverse('tarea-list'), {'include_archived': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_detail_tarea_include_archived(self):
+        """Test that archived tareas are retrieved by id with include_archived"""
+        self.archive(self.tarea1)
+        
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        url = reverse('tarea-detail', kwargs={'pk': self.tarea1.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.get(url, {'include_archived': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['title'], response.data['owner']), ('Test Tarea 1', 'testuser1'))
+        
+        response = self.client.get(reverse('tarea-detail-many'), {'ids': f'{self.tarea1.id},{self.tarea2.id}'})
+        self.assertEqual(response.data['missing'], [self.tarea1.id])
+        
+        response = self.client.get(
+            reverse('tarea-detail-many'), {'ids': f'{self.tarea1.id},{self.tarea2.id}', 'include_archived': '1'}
+        )
+        self.assertEqual([tarea['id'] for tarea in response.data['results']], [self.tarea1.id, self.tarea2.id])
+        self.assertEqual(response.data['missing'], [])
+        
+        # Check that other users still cannot see it
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(self.client.get(url, {'include_archived': '1'}).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_delete_tarea_include_archived(self):
+        """Test that archived tareas can be deleted, but not updated, with include_archived"""
+        self.archive(self.tarea1, self.tarea2)
+        url = reverse('tarea-delete', kwargs={'pk': self.tarea1.id})
+        
+        # Check that other users cannot delete it
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(self.client.delete(url, QUERY_STRING='include_archived=1').status_code, status.HTTP_404_NOT_FOUND)
+        
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.patch(
+            reverse('tarea-update', kwargs={'pk': self.tarea1.id}), {'title': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.delete(url, QUERY_STRING='include_archived=1')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(ArchivedTarea.objects.filter(pk=self.tarea1.id).exists())
+        
+        # Check that the counters drop the tarea and a tombstone is recorded
+        stats = TareaStats.objects.get(owner=self.user1)
+        self.assertEqual((stats.total, stats.completed), (1, 1))
+        self.assertEqual(TareaTombstone.objects.filter(tarea_id=self.tarea1.id).count(), 2)
+        
+        # Check that bulk deletes of archived tareas are counted too
+        ArchivedTarea.objects.filter(owner=self.user1).delete()
+        stats = TareaStats.objects.get(owner=self.user1)
+        self.assertEqual((stats.total, stats.completed), (0, 0))
+        self.assertEqual(TareaTombstone.objects.filter(tarea_id=self.tarea2.id).count(), 2)
+        self.assertEqual(TareaStats.objects.recount(), [])
+    
+    def test_sparse_fields_invalid(self):
+        """Test that unknown fields are rejected"""
+        # Login as user1
+        self.client.force_authenticate(user=self.user1)
+        
+        response = self.client.get(reverse('tarea-list'), {'fields': 'title,secret'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+
+class AsyncTareaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        
+        self.user1 = Usuario.objects.create_user(
+            username='asyncuser1',
+            email='async1@example.com',
+            password='asyncpassword1'
+        )
+        self.user2 = Usuario.objects.create_user(
+            username='asyncuser2',
+            email='async2@example.com',
+            password='asyncpassword2'
+        )
+        self.tarea1 = Tarea.objects.create(title='Async Tarea 1', owner=self.user1)
+        self.tarea2 = Tarea.objects.create(title='Async Tarea 2', completed=True, owner=self.user1)
+        self.tarea3 = Tarea.objects.create(title='Async Tarea 3', owner=self.user2)
+        
+        # Authenticate with the same cookie the login view sets
+        self.async_client.cookies['access_token_cookie'] = str(AccessToken.for_user(self.user1))
+    
+    async def test_async_requires_authentication(self):
+        """Test that the async views reject requests without the cookie"""
+        self.async_client.cookies.clear()
+        
+        response = await self.async_client.get(reverse('tarea-async-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    async def test_async_list_matches_sync_list(self):
+        """Test that the async list returns the same page as the DRF view"""
+        response = await self.async_client.get(reverse('tarea-async-list'), {'completed': 'true'})
+        sync_response = await self.async_client.get(reverse('tarea-list'), {'completed': 'true'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual([tarea['title'] for tarea in response.json()['results']], ['Async Tarea 2'])
+    
+    async def test_async_detail_is_owner_scoped(self):
+        """Test that the async detail only returns the user's own tareas"""
+        response = await self.async_client.get(reverse('tarea-async-detail', kwargs={'pk': self.tarea1.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['owner'], 'asyncuser1')
+        
+        response = await self.async_client.get(reverse('tarea-async-detail', kwargs={'pk': self.tarea3.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    async def test_async_create_update_delete(self):
+        """Test the async write paths and their validation"""
+        response = await self.async_client.post(
+            reverse('tarea-async-create'), {'title': 'AB'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = await self.async_client.post(
+            reverse('tarea-async-create'), {'title': 'Async Created'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pk = response.json()['id']
+        
+        response = await self.async_client.patch(
+            reverse('tarea-async-update', kwargs={'pk': pk}), {'owner': 'asyncuser2'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = await self.async_client.patch(
+            reverse('tarea-async-update', kwargs={'pk': pk}), {'completed': True}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['completed'])
+        
+        response = await self.async_client.delete(reverse('tarea-async-delete', kwargs={'pk': self.tarea3.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = await self.async_client.delete(reverse('tarea-async-delete', kwargs={'pk': pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Tarea.objects.filter(pk=pk).aexists())
+    
+    async def test_export_streams_asynchronously(self):
+        """Test that under ASGI the export is an async stream, not a buffered list"""
+        response = await self.async_client.get(reverse('tarea-export'), {'format': 'csv'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'id,title,description,completed,created_at,updated_at,owner')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['Async Tarea 1', 'Async Tarea 2'])
+    
+    async def test_async_writes_are_throttled(self):
+        """Test that the async write views share the per-user write throttle"""
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'tarea_write_user': '1/min'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            response = await self.async_client.post(
+                reverse('tarea-async-create'), {'title': 'Async Created'}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            
+            response = await self.async_client.delete(reverse('tarea-async-delete', kwargs={'pk': self.tarea1.id}))
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+            
+            # Check that reads are not throttled
+            response = await self.async_client.get(reverse('tarea-async-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class TareaStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        
+        self.user1 = Usuario.objects.create_user(
+            username='streamuser1',
+            email='stream1@example.com',
+            password='streampassword1'
+        )
+        self.user2 = Usuario.objects.create_user(
+            username='streamuser2',
+            email='stream2@example.com',
+            password='streampassword2'
+        )
+        self.tarea1 = Tarea.objects.create(title='Stream Tarea 1', owner=self.user1)
+        
+        # Authenticate with the same cookie the login view sets
+        self.async_client.cookies['access_token_cookie'] = str(AccessToken.for_user(self.user1))
+        
+        # A broker of its own, so no history carries over between tests
+        self.broker = Broker()
+        for target in ('tarea.events.broker', 'tarea.async_views.broker'):
+            patcher = mock.patch(target, self.broker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def published(self):
+        """Patch the backend and return the mock that records published events"""
+        patcher = mock.patch.object(InProcessBackend, 'publish')
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+    
+    async def disconnect(self, chunks):
+        """Cancel the pending read, as the ASGI handler does when the client goes away"""
+        read = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        read.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await read
+    
+    def published_events(self, publish):
+        return [(event.owner_id, event.type, event.data.get('id')) for (event,), _ in publish.call_args_list]
+    
+    async def test_stream_requires_authentication(self):
+        """Test that the stream rejects requests without the cookie"""
+        self.async_client.cookies.clear()
+        
+        response = await self.async_client.get(reverse('tarea-stream'))
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    async def test_stream_pushes_own_events(self):
+        """Test that the stream sends the user's events and nobody else's"""
+        response = await self.async_client.get(reverse('tarea-stream'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertNotIn('Content-Encoding', response)
+        
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        self.assertEqual(self.broker.subscriber_count(), 1)
+        
+        self.broker.deliver(Event(self.user2.pk, 'updated', {'id': 0}))
+        self.broker.deliver(Event(self.user1.pk, 'updated', {'id': self.tarea1.id, 'completed': True}))
+        chunk = (await anext(chunks)).decode()
+        event_id = chunk.splitlines()[0].removeprefix('id: ')
+        self.assertEqual(
+            chunk, f'id: {event_id}\nevent: updated\ndata: {{"id": {self.tarea1.id}, "completed": true}}\n\n'
+        )
+        
+        await self.disconnect(chunks)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+    
+    async def test_stream_sends_keepalive(self):
+        """Test that an idle stream gets a keepalive comment"""
+        with override_settings(TAREA_STREAM_HEARTBEAT_SECONDS=0.01):
+            response = await self.async_client.get(reverse('tarea-stream'))
+            chunks = response.streaming_content
+            await anext(chunks)
+            self.assertEqual(await anext(chunks), b': keepalive\n\n')
+            await self.disconnect(chunks)
+    
+    async def test_stream_resumes_from_last_event_id(self):
+        """Test that a reconnecting client gets the events it missed, or a reset"""
+        subscriber, _ = self.broker.subscribe(self.user1.pk)
+        self.broker.unsubscribe(subscriber)
+        seen = Event(self.user1.pk, 'updated', {'id': 1})
+        self.broker.deliver(seen)
+        self.broker.deliver(Event(self.user1.pk, 'deleted', {'id': 2}))
+        
+        response = await self.async_client.get(reverse('tarea-stream'), headers={'Last-Event-ID': seen.id})
+        chunks = response.streaming_content
+        await anext(chunks)
+        self.assertIn(b'event: deleted\ndata: {"id": 2}', await anext(chunks))
+        await self.disconnect(chunks)
+        
+        # Check that an id from another process or an earlier run resets the client
+        response = await self.async_client.get(reverse('tarea-stream'), headers={'Last-Event-ID': 'unknown-1'})
+        chunks = response.streaming_content
+        await anext(chunks)
+        self.assertEqual(await anext(chunks), b'event: reset\ndata: {}\n\n')
+        await self.disconnect(chunks)
+    
+    @override_settings(TAREA_STREAM_REPLAY_SIZE=2)
+    async def test_broker_resets_when_history_is_gone(self):
+        """Test that events that fell out of the replay history are not silently skipped"""
+        subscriber, _ = self.broker.subscribe(self.user2.pk)
+        self.broker.unsubscribe(subscriber)
+        first = Event(self.user2.pk, 'updated', {'id': 1})
+        self.broker.deliver(first)
+        for pk in range(2, 5):
+            self.broker.deliver(Event(self.user2.pk, 'updated', {'id': pk}))
+        
+        subscriber, missed = self.broker.subscribe(self.user2.pk, first.id)
+        self.broker.unsubscribe(subscriber)
+        
+        self.assertIsNone(missed)
+    
+    async def test_broker_keeps_history_of_connected_owners_only(self):
+        """Test that events of owners without subscribers leave no history behind"""
+        for owner_id in range(50):
+            self.broker.deliver(Event(owner_id, 'updated', {'id': 1}))
+        self.assertEqual(self.broker.history_count(), 0)
+        
+        # Check that an owner who was never connected is reset on resume
+        seen = Event(self.user2.pk, 'updated', {'id': 1})
+        self.broker.deliver(seen)
+        self.broker.deliver(Event(self.user2.pk, 'updated', {'id': 2}))
+        subscriber, missed = self.broker.subscribe(self.user2.pk, seen.id)
+        self.assertIsNone(missed)
+        self.assertEqual(self.broker.history_count(), 1)
+        
+        # Check that the history goes once the owner has been away for the replay window
+        with override_settings(TAREA_STREAM_REPLAY_SECONDS=0):
+            self.broker.unsubscribe(subscriber)
+            self.broker.deliver(Event(self.user2.pk, 'updated', {'id': 1}))
+        self.assertEqual(self.broker.history_count(), 0)
+    
+    @override_settings(TAREA_STREAM_QUEUE_SIZE=2)
+    async def test_slow_subscriber_is_reset(self):
+        """Test that a subscriber whose queue fills gets an overflow instead of more events"""
+        subscriber, _ = self.broker.subscribe(self.user2.pk)
+        try:
+            for pk in range(4):
+                self.broker.deliver(Event(self.user2.pk, 'updated', {'id': pk}))
+            await asyncio.sleep(0)
+            
+            self.assertIs(subscriber.queue.get_nowait(), OVERFLOW)
+            self.assertTrue(subscriber.queue.empty())
+        finally:
+            self.broker.unsubscribe(subscriber)
+    
+    def test_writes_publish_events_on_commit(self):
+        """Test that saves and deletes publish events once committed"""
+        publish = self.published()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            tarea = Tarea.objects.create(title='Published', owner=self.user1)
+            self.assertFalse(publish.called)
+        (event,), _ = publish.call_args
+        self.assertEqual((event.owner_id, event.type, event.data['title']), (self.user1.pk, 'created', 'Published'))
+        self.assertNotIn('owner', event.data)
+        
+        publish.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            tarea.completed = True
+            tarea.save()
+            tarea.owner = self.user2
+            tarea.save()
+            pk = tarea.id
+            tarea.delete()
+        self.assertEqual(self.published_events(publish), [
+            (self.user1.pk, 'updated', pk),
+            (self.user1.pk, 'deleted', pk),
+            (self.user2.pk, 'created', pk),
+            (self.user2.pk, 'deleted', pk),
+        ])
+    
+    def test_bulk_writes_publish_events(self):
+        """Test that queryset writes publish events, or a sync for rows they do not reread"""
+        publish = self.published()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Tarea.objects.filter(owner=self.user1).update(completed=True)
+        self.assertEqual(self.published_events(publish), [(self.user1.pk, 'sync', None)])
+        
+        publish.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            Tarea.objects.filter(pk=self.tarea1.id).delete()
+        self.assertEqual(self.published_events(publish), [(self.user1.pk, 'deleted', self.tarea1.id)])
+    
+    def test_rolled_back_writes_publish_nothing(self):
+        """Test that no event is published for a rolled back transaction"""
+        publish = self.published()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Tarea.objects.create(title='Rolled Back', owner=self.user1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        
+        self.assertFalse(publish.called)
+
+@skipUnless(connection.vendor == 'postgresql', 'Index scans are only checked on Postgres')
+class TareaFilterIndexTests(TestCase):
+    def setUp(self):
+        self.user = Usuario.objects.create_user(
+            username='indexuser',
+            email='index@example.com',
+            password='indexpassword'
+        )
+        Tarea.objects.bulk_create([
+            Tarea(title=f'Tarea {i}', completed=i % 2 == 0, owner=self.user) for i in range(200)
+        ])
+        
+        # Make the planner prefer indexes on the small test table
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tarea_tarea')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    
+    def explain(self, params):
+        """EXPLAIN the page query tareas/list runs: filters, keyset order and LIMIT"""
+        request = Request(APIRequestFactory().get(reverse('tarea-list'), params))
+        request.user = self.user
+        view = TareaListView(request=request, format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(view.get_queryset())
+        return view.paginator.get_page_queryset(queryset, request).explain()
+    
+    def test_completed_uses_partial_index(self):
+        """Test that completed=true pages are read in order from the partial completed index"""
+        for ordering in ('created_at', '-created_at'):
+            with self.subTest(ordering=ordering):
+                plan = self.explain({'completed': 'true', 'ordering': ordering})
+                self.assertIn('tarea_owner_completed_idx', plan)
+                self.assertIn('Limit', plan)
+                self.assertNotIn('Sort', plan)
+    
+    def test_pending_uses_partial_index(self):
+        """Test that completed=false pages are read in order from the partial pending index"""
+        for ordering in ('created_at', '-created_at'):
+            with self.subTest(ordering=ordering):
+                plan = self.explain({'completed': 'false', 'ordering': ordering})
+                self.assertIn('tarea_owner_pending_idx', plan)
+                self.assertNotIn('Sort', plan)
+    
+    def test_created_range_uses_index(self):
+        """Test that a created_at range is an index condition"""
+        plan = self.explain({'created_after': '2000-01-01', 'created_before': '2100-01-01'})
+        self.assertIn('Index', plan)
+        self.assertNotIn('Seq Scan', plan)
+    
+    def test_title_prefix_uses_pattern_index(self):
+        """Test that a title prefix is answered by the pattern ops index"""
+        # A selective prefix: for one matching most rows, reading the
+        # (owner, created_at, id) index in order is rightly cheaper.
+        self.assertIn('tarea_owner_title_prefix_idx', self.explain({'title': 'Tarea 42'}))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Full-text search needs Postgres')
+class TareaSearchTests(APITestCase):
+    def setUp(self):
+        self.user1 = Usuario.objects.create_user(
+            username='searchuser1',
+            email='search1@example.com',
+            password='searchpassword1'
+        )
+        self.user2 = Usuario.objects.create_user(
+            username='searchuser2',
+            email='search2@example.com',
+            password='searchpassword2'
+        )
+        self.in_title = Tarea.objects.create(title='Buy milk', description='At the corner shop', owner=self.user1)
+        self.in_description = Tarea.objects.create(title='Groceries', description='Bread and milk', owner=self.user1)
+        Tarea.objects.create(title='Walk the dog', owner=self.user1)
+        Tarea.objects.create(title='Buy milk too', owner=self.user2)
+        self.client.force_authenticate(user=self.user1)
+    
+    def test_search_ranks_title_matches_first(self):
+        """Test that search only returns the user's matches, title hits first"""
+        response = self.client.get(reverse('tarea-search'), {'q': 'milk'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [tarea['id'] for tarea in response.data['results']]
+        self.assertEqual(ids, [self.in_title.id, self.in_description.id])
+    
+    def test_search_vector_follows_updates(self):
+        """Test that the trigger reindexes bulk updates"""
+        Tarea.objects.filter(id=self.in_description.id).update(description='Bread and butter')
+        
+        response = self.client.get(reverse('tarea-search'), {'q': 'milk'})
+        
+        ids = [tarea['id'] for tarea in response.data['results']]
+        self.assertEqual(ids, [self.in_title.id])
+    
+    def test_search_uses_gin_index(self):
+        """Test that the search is answered by the GIN index"""
+        query = SearchQuery('milk', config=SEARCH_CONFIG, search_type='websearch')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        
+        plan = Tarea.objects.filter(owner=self.user1, search_vector=query).explain()
+        
+        self.assertIn('tarea_owner_search_idx', plan)
@@ -1,18 +1,46 @@
 from django.urls import path
+from .async_views import (
+    AsyncTareaListView,
+    AsyncTareaCreateView,
+    AsyncTareaDetailView,
+    AsyncTareaUpdateView,
+    AsyncTareaDeleteView,
+    TareaStreamView
+)
 from .views import (
     TareaListView,
     TareaCreateView,
     TareaDetailView,
+    TareaMultiDetailView,
     TareaUpdateView,
     TareaDeleteView,
-    TareaFilterCompletedView
+    TareaFilterCompletedView,
+    TareaBulkView,
+    TareaExportView,
+    TareaImportView,
+    TareaSearchView,
+    TareaStatsView,
+    TareaChangesView
 )
 
 urlpatterns = [
     path('list', TareaListView.as_view(), name='tarea-list'),
     path('create', TareaCreateView.as_view(), name='tarea-create'),
+    path('detail', TareaMultiDetailView.as_view(), name='tarea-detail-many'),
     path('detail/<int:pk>', TareaDetailView.as_view(), name='tarea-detail'),
     path('update/<int:pk>', TareaUpdateView.as_view(), name='tarea-update'),
     path('delete/<int:pk>', TareaDeleteView.as_view(), name='tarea-delete'),
     path('filter/completed', TareaFilterCompletedView.as_view(), name='tarea-filter-completed'),
+    path('bulk', TareaBulkView.as_view(), name='tarea-bulk'),
+    path('export', TareaExportView.as_view(), name='tarea-export'),
+    path('import', TareaImportView.as_view(), name='tarea-import'),
+    path('search', TareaSearchView.as_view(), name='tarea-search'),
+    path('stats', TareaStatsView.as_view(), name='tarea-stats'),
+    path('changes', TareaChangesView.as_view(), name='tarea-changes'),
+    path('stream', TareaStreamView.as_view(), name='tarea-stream'),
+    path('async/list', AsyncTareaListView.as_view(), name='tarea-async-list'),
+    path('async/create', AsyncTareaCreateView.as_view(), name='tarea-async-create'),
+    path('async/detail/<int:pk>', AsyncTareaDetailView.as_view(), name='tarea-async-detail'),
+    path('async/update/<int:pk>', AsyncTareaUpdateView.as_view(), name='tarea-async-update'),
+    path('async/delete/<int:pk>', AsyncTareaDeleteView.as_view(), name='tarea-async-delete'),
 ] 
\ No newline at end of file
@@ -1,7 +1,49 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router, transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from .models import Tarea
-from .serializers import TareaSerializer
+from users.throttling import UserThrottle
+from . import cache, conditional
+from .export import astream_tareas, stream_tareas
+from .fields import get_fields, select_instances, select_values
+from .filters import TareaFilterBackend, get_ordering, include_archived
+from .importers import DEFAULT_BATCH_SIZE, FORMATS as IMPORT_FORMATS, import_tareas
+from .models import SEARCH_CONFIG, ArchivedTarea, Tarea, TareaStats
+from .pagination import KeysetPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import TareaSerializer, TareaListSerializer, TareaStatsSerializer
+from .sync import ExpiredCursor, get_changes
+
+UPDATABLE_FIELDS = ['title', 'description', 'completed']
+
+def clean_update_data(payload):
+    """
+    Keep only the updatable fields of a PATCH payload.
+
+    Returns ``(data, None)`` on success or ``(None, error_message)`` when the
+    payload names a field that cannot be updated or no field at all.
+    """
+    data = {}
+    invalid_fields = []
+    
+    for field in payload:
+        if field in UPDATABLE_FIELDS:
+            data[field] = payload[field]
+        else:
+            invalid_fields.append(field)
+    
+    if invalid_fields:
+        return None, f"Invalid fields: {', '.join(invalid_fields)}. Only title, description, and completed can be updated."
+    
+    if not data:
+        return None, "No valid fields to update. Only title, description, and completed can be updated."
+    
+    return data, None
 
 class IsOwner(permissions.BasePermission):
     """
@@ -15,13 +57,58 @@ class IsOwner(permissions.BasePermission):
 
 class TareaListView(generics.ListAPIView):
     """
-    List all tareas for the authenticated user.
+    List the tareas of the authenticated user.
+
+    Supports the ``completed``, ``created_after``, ``created_before``, ``title``
+    and ``ordering`` query parameters (see ``tarea.filters``) and sparse
+    ``fields`` (see ``tarea.fields``). With ``include_archived=1`` archived
+    tareas are listed too, in the same order and pages. Rendered pages
+    are cached per user and query string until one of the user's tareas
+    changes (see ``tarea.cache``), and conditional requests are answered
+    with 304 before anything is serialized (see ``tarea.conditional``).
     """
-    serializer_class = TareaSerializer
+    serializer_class = TareaListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [TareaFilterBackend]
+    pagination_class = KeysetPagination
     
-    def get_queryset(self):
-        return Tarea.objects.filter(owner=self.request.user)
+    def get_queryset(self, model=Tarea):
+        return select_values(
+            model.objects.filter(owner=self.request.user),
+            get_fields(self.request.query_params),
+            TareaListSerializer.value_fields
+        )
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not include_archived(self.request.query_params):
+            return queryset
+        # Paginated together as one UNION ALL (see KeysetPagination).
+        return [queryset, super().filter_queryset(self.get_queryset(ArchivedTarea))]
+
+    def list(self, request, *args, **kwargs):
+        key = cache.get_key(request)
+        page = cache.get_page(key)
+        etag = page['etag'] if page is not None else conditional.get_list_etag(key, request)
+
+        # Lists carry no Last-Modified: deleting an older tarea would not move it.
+        response = conditional.get_not_modified_response(request, etag, None)
+        if response is None:
+            if page is not None:
+                response = Response(page['data'])
+            else:
+                response = super().list(request, *args, **kwargs)
+                cache.set_page(key, {'data': response.data, 'etag': etag})
+            conditional.set_validators(response, etag, None)
+
+        response['X-Cache'] = 'HIT' if page is not None else 'MISS'
+        return response
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['owner'] = self.request.user.username
+        context['fields'] = get_fields(self.request.query_params)
+        return context
 
 class TareaCreateView(generics.CreateAPIView):
     """
@@ -29,19 +116,110 @@ class TareaCreateView(generics.CreateAPIView):
     """
     serializer_class = TareaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
     
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 class TareaDetailView(generics.RetrieveAPIView):
     """
-    Retrieve a tarea instance.
+    Retrieve a tarea instance, narrowed to the ``fields`` query parameter if
+    given, or an archived one with ``include_archived=1``. Conditional
+    requests are answered with 304 when the tarea has not changed.
     """
     serializer_class = TareaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
     
-    def get_queryset(self):
-        return Tarea.objects.filter(owner=self.request.user)
+    def get_queryset(self, model=Tarea):
+        queryset = model.objects.filter(owner=self.request.user)
+        fields = get_fields(self.request.query_params)
+        if fields is not None:
+            return select_instances(queryset, fields)
+        if model is not Tarea:
+            return queryset.select_related('owner')
+        return queryset.select_related('owner').defer('search_vector')
+    
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if not include_archived(self.request.query_params):
+                raise
+        instance = get_object_or_404(self.get_queryset(ArchivedTarea), pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['fields'] = get_fields(self.request.query_params)
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = conditional.get_instance_validators(instance, request)
+
+        response = conditional.get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+            conditional.set_validators(response, etag, last_modified)
+        return response
+
+class TareaMultiDetailView(generics.GenericAPIView):
+    """
+    Retrieve several tareas by id in one request: ``detail?ids=1,2,3``.
+
+    Runs a single owner-scoped ``id IN (...)`` query. Results keep the order of
+    the requested ids, and ids that do not exist or belong to another user are
+    listed under ``missing``. Accepts sparse ``fields`` and
+    ``include_archived`` like the list.
+    """
+    serializer_class = TareaListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+    
+    def get_queryset(self, model=Tarea):
+        return select_values(
+            model.objects.filter(owner=self.request.user),
+            get_fields(self.request.query_params),
+            TareaListSerializer.value_fields
+        )
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['owner'] = self.request.user.username
+        context['fields'] = get_fields(self.request.query_params)
+        return context
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            ids = list(dict.fromkeys(
+                int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()
+            ))
+        except ValueError:
+            return Response(
+                {"error": "ids must be a comma-separated list of integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not ids:
+            return Response({"error": "ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(ids) > self.max_ids:
+            return Response(
+                {"error": f"At most {self.max_ids} ids are allowed per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        rows = {row['id']: row for row in self.get_queryset().filter(id__in=ids)}
+        if len(rows) < len(ids) and include_archived(request.query_params):
+            missing = [pk for pk in ids if pk not in rows]
+            rows.update((row['id'], row) for row in self.get_queryset(ArchivedTarea).filter(id__in=missing))
+        found = [rows[pk] for pk in ids if pk in rows]
+        serializer = self.get_serializer(found, many=True)
+        return Response({
+            "results": serializer.data,
+            "missing": [pk for pk in ids if pk not in rows],
+        })
 
 class TareaUpdateView(generics.UpdateAPIView):
     """
@@ -49,60 +227,348 @@ class TareaUpdateView(generics.UpdateAPIView):
     """
     serializer_class = TareaSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
     http_method_names = ['patch']
     
     def get_queryset(self):
-        return Tarea.objects.filter(owner=self.request.user)
+        # Locked until the update commits, so that the counters are adjusted
+        # from the row's current values rather than a stale read.
+        return Tarea.objects.filter(owner=self.request.user).defer('search_vector').select_for_update()
     
+    @transaction.atomic
     def patch(self, request, *args, **kwargs):
         instance = self.get_object()
         
-        allowed_fields = ['title', 'description', 'completed']
-        data = {}
-        invalid_fields = []
+        data, error = clean_update_data(request.data)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
         
-        for field in request.data:
-            if field in allowed_fields:
-                data[field] = request.data[field]
-            else:
-                invalid_fields.append(field)
+        serializer = self.get_serializer(instance, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
         
-        if invalid_fields:
+        return Response(serializer.data)
+
+class TareaDeleteView(generics.DestroyAPIView):
+    """
+    Delete a tarea instance, or an archived one with ``include_archived=1``.
+    """
+    serializer_class = TareaSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
+    
+    def get_queryset(self, model=Tarea):
+        # Locked until the delete commits: a concurrent delete of the same
+        # tarea waits and then finds it gone instead of counting it twice.
+        return model.objects.filter(owner=self.request.user).select_for_update()
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if not include_archived(self.request.query_params):
+                raise
+        instance = get_object_or_404(self.get_queryset(ArchivedTarea), pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
+class TareaFilterCompletedView(TareaListView):
+    """
+    List all completed tareas for the authenticated user.
+
+    Kept for existing clients; equivalent to ``tareas/list?completed=true``.
+    """
+    def get_queryset(self, model=Tarea):
+        return super().get_queryset(model).filter(completed=True)
+
+def is_id(value):
+    # JSON true and false parse to bool, a subclass of int.
+    return type(value) is int
+
+class TareaBulkView(generics.GenericAPIView):
+    """
+    Apply many create, update and delete operations in one transaction.
+
+    The body is ``{"operations": [...]}`` where each operation is one of
+    ``{"op": "create", "data": {...}}``, ``{"op": "update", "id": 1, "data":
+    {...}}`` or ``{"op": "delete", "id": 1}``. Operations follow the same rules
+    as the single-object views. If any operation is invalid nothing is applied
+    and the response is a 400 with a result for every operation; otherwise all
+    of them are written with one ``bulk_create``, one ``bulk_update`` and one
+    delete.
+    """
+    serializer_class = TareaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
+    max_operations = 1000
+    
+    def get_queryset(self):
+        return Tarea.objects.filter(owner=self.request.user).defer('search_vector')
+    
+    def post(self, request, *args, **kwargs):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
             return Response(
-                {
-                    "error": f"Invalid fields: {', '.join(invalid_fields)}. Only title, description, and completed can be updated."
-                },
+                {"error": "operations must be a non-empty list."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not data:
+        if len(operations) > self.max_operations:
             return Response(
-                {"error": "No valid fields to update. Only title, description, and completed can be updated."},
+                {"error": f"At most {self.max_operations} operations are allowed per request."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        serializer = self.get_serializer(instance, data=data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            results, to_create, to_update, update_fields, to_delete = self.plan(operations)
+            
+            if any(result['status'] >= 400 for result in results):
+                for result in results:
+                    if result['status'] < 400:
+                        result['status'] = status.HTTP_424_FAILED_DEPENDENCY
+                        result['error'] = 'Not applied because another operation failed.'
+                        result.pop('instance', None)
+                return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+            
+            Tarea.objects.bulk_create(to_create)
+            if to_update:
+                Tarea.objects.bulk_update(to_update.values(), sorted(update_fields))
+            if to_delete:
+                self.get_queryset().filter(pk__in=to_delete).delete()
         
-        return Response(serializer.data)
+        for result in results:
+            if 'instance' in result:
+                result['data'] = self.get_serializer(result.pop('instance')).data
+        return Response({"results": results}, status=status.HTTP_200_OK)
+    
+    def plan(self, operations):
+        """
+        Validate every operation and collect the writes without touching the
+        database, apart from one locking query for the referenced tareas.
+        """
+        ids = [
+            operation.get('id') for operation in operations
+            if isinstance(operation, dict) and is_id(operation.get('id'))
+        ]
+        instances = self.get_queryset().select_for_update().in_bulk(ids)
+        for instance in instances.values():
+            instance.owner = self.request.user
+        
+        results = []
+        to_create = []
+        to_update = {}
+        update_fields = set()
+        to_delete = set()
+        
+        for operation in operations:
+            op = operation.get('op') if isinstance(operation, dict) else None
+            result = {'op': op}
+            results.append(result)
+            
+            if op not in ('create', 'update', 'delete'):
+                result.update(status=status.HTTP_400_BAD_REQUEST, error='op must be create, update or delete.')
+                continue
+            
+            if op == 'create':
+                serializer = self.get_serializer(data=operation.get('data', {}))
+                if not serializer.is_valid():
+                    result.update(status=status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+                    continue
+                instance = Tarea(**serializer.validated_data, owner=self.request.user)
+                to_create.append(instance)
+                result.update(status=status.HTTP_201_CREATED, instance=instance)
+                continue
+            
+            pk = operation.get('id')
+            result['id'] = pk
+            instance = instances.get(pk) if is_id(pk) else None
+            if instance is None or pk in to_delete:
+                result.update(status=status.HTTP_404_NOT_FOUND, error='Not found.')
+                continue
+            
+            if op == 'delete':
+                to_delete.add(pk)
+                to_update.pop(pk, None)
+                result.update(status=status.HTTP_204_NO_CONTENT)
+                continue
+            
+            payload = operation.get('data')
+            data, error = clean_update_data(payload if isinstance(payload, dict) else {})
+            if error:
+                result.update(status=status.HTTP_400_BAD_REQUEST, error=error)
+                continue
+            serializer = self.get_serializer(instance, data=data, partial=True)
+            if not serializer.is_valid():
+                result.update(status=status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(instance, field, value)
+            update_fields.update(serializer.validated_data)
+            to_update[pk] = instance
+            result.update(status=status.HTTP_200_OK, instance=instance)
+        
+        return results, to_create, to_update, update_fields, to_delete
 
-class TareaDeleteView(generics.DestroyAPIView):
+class TareaExportView(generics.GenericAPIView):
     """
-    Delete a tarea instance.
+    Stream every tarea of the authenticated user as ``?format=ndjson`` (the
+    default) or ``?format=csv``. Accepts the same filters as the list view.
+    Under ASGI the rows are streamed from an async generator.
     """
-    serializer_class = TareaSerializer
-    permission_classes = [permissions.IsAuthenticated, IsOwner]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    filter_backends = [TareaFilterBackend]
     
     def get_queryset(self):
         return Tarea.objects.filter(owner=self.request.user)
+    
+    def get(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*get_ordering(request.query_params))
+        # The rows are read after the response leaves the replica middleware,
+        # so choose the database now, while the request's pin still applies.
+        queryset = queryset.using(router.db_for_read(Tarea))
+        
+        stream = astream_tareas if isinstance(request._request, ASGIRequest) else stream_tareas
+        response = StreamingHttpResponse(
+            stream(queryset, request.user.username, renderer.format),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="tareas.{renderer.format}"'
+        return response
 
-class TareaFilterCompletedView(generics.ListAPIView):
+class TareaImportView(generics.GenericAPIView):
     """
-    List all completed tareas for the authenticated user.
+    Import tareas from an uploaded NDJSON or CSV ``file`` (multipart).
+
+    The optional ``format`` field defaults to ``csv`` for ``.csv`` files and
+    ``ndjson`` otherwise, and ``batch_size`` sets how many rows go into each
+    ``bulk_create``. Invalid rows are reported by line number and skipped.
     """
-    serializer_class = TareaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserThrottle]
+    throttle_scope = 'tarea_write'
+    parser_classes = [MultiPartParser]
+    max_batch_size = 5000
+    
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        import_format = request.data.get('format') or ('csv' if upload.name.lower().endswith('.csv') else 'ndjson')
+        if import_format not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            batch_size = int(request.data.get('batch_size', DEFAULT_BATCH_SIZE))
+        except (TypeError, ValueError):
+            batch_size = 0
+        if not 1 <= batch_size <= self.max_batch_size:
+            return Response(
+                {"error": f"batch_size must be between 1 and {self.max_batch_size}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        report = import_tareas(upload, request.user, import_format, batch_size=batch_size)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+class TareaSearchView(generics.ListAPIView):
+    """
+    Full-text search over the title and description of the authenticated
+    user's tareas: ``search?q=...``.
+
+    ``q`` accepts web search syntax (quoted phrases, ``or``, ``-term``).
+    Results are ranked with title matches above description matches and
+    limited to ``limit`` rows (default 20, max 100). Postgres only.
+    """
+    serializer_class = TareaListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['owner'] = self.request.user.username
+        return context
+    
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
     
     def get_queryset(self):
-        return Tarea.objects.filter(owner=self.request.user, completed=True)
+        query = SearchQuery(self.request.query_params['q'], config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            Tarea.objects
+            .filter(owner=self.request.user, search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-id')
+            .values(*TareaListSerializer.value_fields)[:self.get_limit()]
+        )
+    
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('q', '').strip():
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return Response({"results": serializer.data})
+
+class TareaStatsView(generics.RetrieveAPIView):
+    """
+    Total, completed and pending counts for the authenticated user, read from
+    the ``TareaStats`` counters with a single query.
+    """
+    serializer_class = TareaStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_object(self):
+        try:
+            return TareaStats.objects.get(owner=self.request.user)
+        except TareaStats.DoesNotExist:
+            return TareaStats(owner=self.request.user)
+
+class TareaChangesView(generics.GenericAPIView):
+    """
+    Delta sync: ``changes?since=<cursor>`` returns the tareas created or
+    updated and the ids deleted since the cursor, plus the cursor for the next
+    call (see ``tarea.sync``). Without ``since`` every tarea is returned.
+    Follow ``next`` while ``has_more`` is true; a cursor older than the
+    tombstone retention gets a 410 and the client must sync from scratch.
+    """
+    serializer_class = TareaListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['owner'] = self.request.user.username
+        return context
+    
+    def get(self, request, *args, **kwargs):
+        page_size = KeysetPagination().get_page_size(request.query_params)
+        try:
+            rows, deleted, cursor, has_more = get_changes(request.user, request.query_params.get('since'), page_size)
+        except ExpiredCursor:
+            return Response(
+                {"error": "The cursor has expired; sync again without since."},
+                status=status.HTTP_410_GONE
+            )
+        
+        return Response({
+            "changes": self.get_serializer(rows, many=True).data,
+            "deleted": deleted,
+            "next": cursor,
+            "has_more": has_more,
+        })
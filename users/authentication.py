@@ -1,9 +1,16 @@
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from gestor_tareas.timing import measure
+from . import cache as user_cache
+from .cookies import ACCESS_COOKIE
 
 class JWTAuthenticationFromCookie(JWTAuthentication):
     def get_jwt_value(self, request):
-        auth_cookie = request.COOKIES.get('access_token_cookie')
+        auth_cookie = request.COOKIES.get(ACCESS_COOKIE)
         if not auth_cookie:
             return None
         return auth_cookie
@@ -23,4 +30,78 @@ class JWTAuthenticationFromCookie(JWTAuthentication):
             raise AuthenticationFailed('No valid token found in cookie')
 
         user = self.get_user(validated_token)
-        return (user, validated_token)
\ No newline at end of file
+        return (user, validated_token)
+
+    def get_validated_token(self, raw_token):
+        with measure('auth'):
+            return super().get_validated_token(raw_token)
+
+    def get_user(self, validated_token):
+        """
+        Resolve the user through ``users.cache`` when it is enabled, falling
+        back to the database lookup and checks of ``JWTAuthentication``.
+        """
+        with measure('auth'):
+            keys = user_cache.get_keys(validated_token)
+            if keys is None:
+                return super().get_user(validated_token)
+
+            user, version = user_cache.get_user(keys)
+            if user is None:
+                user = super().get_user(validated_token)
+                user_cache.set_user(keys, user, version, validated_token)
+            return user
+
+    async def aauthenticate(self, request):
+        """
+        Async version of ``authenticate`` for native async views. Token
+        validation is CPU-only; the user lookup uses the async ORM.
+        """
+        raw_token = self.get_jwt_value(request)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if not validated_token:
+            raise AuthenticationFailed('No valid token found in cookie')
+
+        user = await self.aget_user(validated_token)
+        return (user, validated_token)
+
+    async def aget_user(self, validated_token):
+        """
+        Async version of ``get_user``.
+        """
+        with measure('auth'):
+            keys = user_cache.get_keys(validated_token)
+            if keys is None:
+                return await self.aget_user_from_db(validated_token)
+
+            user, version = await user_cache.aget_user(keys)
+            if user is None:
+                user = await self.aget_user_from_db(validated_token)
+                await user_cache.aset_user(keys, user, version, validated_token)
+            return user
+
+    async def aget_user_from_db(self, validated_token):
+        """
+        Async version of ``JWTAuthentication.get_user`` with the same checks.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
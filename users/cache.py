@@ -0,0 +1,135 @@
+"""
+Cache of the users resolved from access tokens.
+
+Entries are keyed by user id and token ``jti`` and tagged with a per-user
+version. Saving or deleting a ``Usuario`` bumps the version, so every entry
+cached for that user stops matching at once. An entry never outlives the token
+it was cached for. Writes that skip the model signals (``QuerySet.update``)
+are only picked up once the entry expires.
+
+Only the fields requests read off ``request.user`` are cached, never the
+password hash, permissions or flags. A cached user comes back with every other
+field deferred, so code that needs the full row has to load it.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = 'jwt-user'
+
+CACHED_FIELDS = ('id', 'username', 'is_active')
+
+
+def get_cache():
+    return caches[getattr(settings, 'JWT_USER_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 0)
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}:version'
+
+
+def entry_key(user_id, jti):
+    return f'{KEY_PREFIX}:{user_id}:{jti}'
+
+
+def get_keys(validated_token):
+    """
+    Return the ``(version_key, entry_key)`` pair for a token, or ``None`` when
+    the cache is disabled or the token lacks a user id or ``jti``.
+    """
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    jti = validated_token.get(api_settings.JTI_CLAIM)
+    if get_timeout() <= 0 or user_id is None or jti is None:
+        return None
+    return version_key(user_id), entry_key(user_id, jti)
+
+
+def get_entry_timeout(validated_token):
+    expires_at = validated_token.get('exp')
+    if expires_at is None:
+        return get_timeout()
+    return min(get_timeout(), int(expires_at - time.time()))
+
+
+def pack(user):
+    return tuple(getattr(user, name) for name in CACHED_FIELDS)
+
+
+def unpack_user(values):
+    model = get_user_model()
+    return model.from_db(router.db_for_write(model), CACHED_FIELDS, values)
+
+
+def unpack(keys, values):
+    version = values.get(keys[0])
+    entry = values.get(keys[1])
+    if version is not None and entry is not None and entry[0] == version:
+        return unpack_user(entry[1]), version
+    return None, version
+
+
+def get_user(keys):
+    """
+    Return ``(user, version)`` with one cache round trip. ``user`` is ``None``
+    on a miss; ``version`` must be passed back to ``set_user``.
+    """
+    return unpack(keys, get_cache().get_many(keys))
+
+
+async def aget_user(keys):
+    return unpack(keys, await get_cache().aget_many(keys))
+
+
+def set_user(keys, user, version, validated_token):
+    """
+    Cache the ``CACHED_FIELDS`` of ``user`` under the version read before it was loaded, so a user
+    saved in the meantime is never cached as current.
+    """
+    timeout = get_entry_timeout(validated_token)
+    if timeout <= 0:
+        return
+    cache = get_cache()
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(keys[0], version, timeout=None):
+            return
+    cache.set(keys[1], (version, pack(user)), timeout)
+
+
+async def aset_user(keys, user, version, validated_token):
+    timeout = get_entry_timeout(validated_token)
+    if timeout <= 0:
+        return
+    cache = get_cache()
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(keys[0], version, timeout=None):
+            return
+    await cache.aset(keys[1], (version, pack(user)), timeout)
+
+
+def bump_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        # No version yet: seed one so that a lookup already in flight cannot
+        # store the user it read before this write.
+        cache.set(version_key(user_id), time.time_ns(), timeout=None)
+
+
+def invalidate(user_id):
+    """
+    Drop every cached entry for ``user_id``, right away and again on commit,
+    like ``tarea.cache.invalidate``.
+    """
+    bump_version(user_id)
+    transaction.on_commit(lambda: bump_version(user_id))
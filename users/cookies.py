@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.settings import api_settings
+
+ACCESS_COOKIE = 'access_token_cookie'
+REFRESH_COOKIE = 'refresh_token'
+
+
+def set_auth_cookies(resp, access_token, refresh_token=None):
+    """
+    Set the HTTP-only JWT cookies on ``resp``. Each cookie lives as long as its
+    token; the refresh cookie is only replaced when a new one is given.
+    """
+    resp.set_cookie(
+        ACCESS_COOKIE,
+        value=access_token,
+        httponly=True,
+        samesite='Lax',
+        max_age=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    )
+
+    if refresh_token is not None:
+        resp.set_cookie(
+            REFRESH_COOKIE,
+            value=refresh_token,
+            httponly=True,
+            samesite='Lax',
+            max_age=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+        )
+    return resp
@@ -0,0 +1,62 @@
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from gestor_tareas.benchmarking import seeded_user, unthrottled
+from users.cookies import REFRESH_COOKIE
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the CPU cost of users/login (password hashing) with '
+        'users/refresh (token signing only).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, requests, **options):
+        if requests < 1:
+            raise CommandError('--requests must be at least 1.')
+
+        password = uuid.uuid4().hex
+        with seeded_user('auth', password=password) as user, unthrottled():
+            login = self.measure(requests, lambda client: client.post(
+                reverse('usuario-login'), {'username': user.username, 'password': password},
+                content_type='application/json'
+            ))
+
+            client = Client()
+            client.post(
+                reverse('usuario-login'), {'username': user.username, 'password': password},
+                content_type='application/json'
+            )
+            refresh_token = client.cookies[REFRESH_COOKIE].value
+
+            def refresh(client):
+                # Resend the original cookie so rotation does not change the work.
+                client.cookies[REFRESH_COOKIE] = refresh_token
+                return client.post(reverse('usuario-refresh'))
+
+            results = {'login': login, 'refresh': self.measure(requests, refresh)}
+
+        results['cpu_ratio'] = round(results['login']['cpu_ms'] / max(results['refresh']['cpu_ms'], 0.001), 1)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, requests, send):
+        client = Client()
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        for _ in range(requests):
+            response = send(client)
+            if response.status_code != 200:
+                raise CommandError(f'{response.request["PATH_INFO"]} returned {response.status_code}')
+        cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+        return {
+            'requests': requests,
+            'cpu_ms': round(cpu / requests * 1000, 2),
+            'wall_ms': round(wall / requests * 1000, 2),
+        }
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from gestor_tareas.timing import TimedSerializerMixin
 from .models import Usuario
 
-class UsuarioSerializers(serializers.ModelSerializer):
+class UsuarioSerializers(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     email = serializers.EmailField(required=True)
 
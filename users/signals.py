@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as user_cache
+from .models import Usuario
+
+
+@receiver(post_save, sender=Usuario)
+def invalidate_user_cache_on_save(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=Usuario)
+def invalidate_user_cache_on_delete(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
@@ -1,3 +1,276 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import Usuario
+from . import cache as user_cache
+from .cookies import ACCESS_COOKIE, REFRESH_COOKIE
+from .throttling import TokenBucketThrottle
+
+
+@override_settings(JWT_USER_CACHE_TIMEOUT=300)
+class UserCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+
+        # Set up API client with an access cookie
+        self.client = APIClient()
+        self.client.cookies['access_token_cookie'] = str(AccessToken.for_user(self.user))
+
+    def test_warm_cache_needs_no_auth_query(self):
+        """Test that a cached user is authenticated without a query"""
+        url = reverse('tarea-list')
+        self.client.get(url)
+
+        # Check that the second request does not load the user
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any('users_usuario' in query['sql'] for query in queries))
+
+    def test_details_load_the_full_user(self):
+        """Test that the details endpoint works with a cached user"""
+        self.client.get(reverse('usuario-details'))
+
+        # Check that the second request only loads the details themselves
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('usuario-details'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['username'], 'testuser1')
+        self.assertEqual(response.data['email'], 'test1@example.com')
+
+    def test_cache_keeps_only_auth_fields(self):
+        """Test that the password hash and flags are not cached"""
+        self.client.get(reverse('usuario-details'))
+
+        keys = user_cache.get_keys(AccessToken(self.client.cookies['access_token_cookie'].value))
+        entry = cache.get(keys[1])
+
+        # Check that the entry holds just the cached fields
+        self.assertEqual(entry[1], (self.user.pk, 'testuser1', True))
+        self.assertNotIn(self.user.password, entry[1])
+
+        # Check that the rebuilt user defers everything else
+        user, _ = user_cache.get_user(keys)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertIn('is_superuser', user.get_deferred_fields())
+
+    def test_cache_invalidated_on_save(self):
+        """Test that deactivating a user takes effect on the next request"""
+        self.client.get(reverse('usuario-details'))
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('usuario-details'))
+
+        # Check that the inactive user was rejected
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_invalidated_on_delete(self):
+        """Test that a deleted user is not served from the cache"""
+        self.client.get(reverse('usuario-details'))
+
+        self.user.delete()
+        response = self.client.get(reverse('usuario-details'))
+
+        # Check that the deleted user was rejected
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """Test that every request loads the user when the cache is off"""
+        self.client.get(reverse('usuario-details'))
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse('usuario-details'))
+
+    def test_entry_never_outlives_token(self):
+        """Test that the cache timeout is capped by the token expiry"""
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=30))
+
+        self.assertLessEqual(user_cache.get_entry_timeout(token), 30)
+
+
+class RefreshTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+
+        # Login to get the refresh cookie
+        self.client = APIClient()
+        self.client.post(reverse('usuario-login'), {'username': 'testuser1', 'password': 'testpassword1'})
+        self.refresh_token = self.client.cookies[REFRESH_COOKIE].value
+
+    def test_refresh_sets_new_access_cookie(self):
+        """Test that the refresh cookie is exchanged for a new access cookie"""
+        old_access = self.client.cookies[ACCESS_COOKIE].value
+        response = self.client.post(reverse('usuario-refresh'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.cookies[ACCESS_COOKIE].value, old_access)
+        self.assertNotIn(REFRESH_COOKIE, response.cookies)
+
+        # Check that the new access cookie authenticates
+        response = self.client.get(reverse('usuario-details'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh_without_cookie(self):
+        """Test that refreshing without a refresh cookie is rejected"""
+        response = APIClient().post(reverse('usuario-refresh'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_with_invalid_cookie(self):
+        """Test that a malformed refresh cookie is rejected"""
+        self.client.cookies[REFRESH_COOKIE] = 'not-a-token'
+        response = self.client.post(reverse('usuario-refresh'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_inactive_user(self):
+        """Test that an inactive user cannot refresh"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('usuario-refresh'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotation_blacklists_old_token(self):
+        """Test that a rotated refresh token cannot be used again"""
+        with mock.patch.object(api_settings, 'ROTATE_REFRESH_TOKENS', True):
+            response = self.client.post(reverse('usuario-refresh'))
+
+            # Check that a new refresh cookie was issued
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response.cookies[REFRESH_COOKIE].value, self.refresh_token)
+
+            # Check that the old refresh token was blacklisted
+            self.client.cookies[REFRESH_COOKIE] = self.refresh_token
+            response = self.client.post(reverse('usuario-refresh'))
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_benchmark_auth_command(self):
+        """Test that the login/refresh benchmark runs and cleans up"""
+        out = StringIO()
+        call_command('benchmark_auth', requests=1, stdout=out)
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(set(result), {'login', 'refresh', 'cpu_ratio'})
+        self.assertEqual(Usuario.objects.count(), 1)
+
+
+def throttle_rates(**rates):
+    rest_framework = settings.REST_FRAMEWORK
+    return override_settings(REST_FRAMEWORK={
+        **rest_framework,
+        'DEFAULT_THROTTLE_RATES': {**rest_framework['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        # Create a test user
+        self.user = Usuario.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpassword1'
+        )
+        self.client = APIClient()
+
+    def login(self, username='testuser1', password='wrongpassword'):
+        return self.client.post(reverse('usuario-login'), {'username': username, 'password': password})
+
+    @throttle_rates(login_username='3/min')
+    def test_login_throttled_by_username(self):
+        """Test that repeated logins for one username are throttled before hashing"""
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with mock.patch('users.views.authenticate') as authenticate:
+            response = self.login()
+
+        # Check that the request was rejected without checking the password
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn(int(response['Retry-After']), range(1, 21))
+        authenticate.assert_not_called()
+
+        # Check that other usernames are not affected
+        self.assertEqual(self.login(username='someoneelse').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @throttle_rates(login_ip='2/min')
+    def test_login_throttled_by_ip(self):
+        """Test that one address cannot spread attempts over many usernames"""
+        self.login(username='user-a')
+        self.login(username='user-b')
+
+        response = self.login(username='user-c')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(login_username='2/min')
+    def test_bucket_refills_over_time(self):
+        """Test that a token is returned to the bucket after its interval"""
+        now = 1_000_000.0
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now):
+            self.login()
+            self.login()
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            # Check that one request fits again after 30 seconds, but not two
+            now += 30
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(register_ip='1/hour')
+    def test_register_throttled(self):
+        """Test that registrations are throttled by address"""
+        data = {'username': 'newuser', 'email': 'new@example.com', 'password': 'newpassword1'}
+        self.assertEqual(self.client.post(reverse('usuario-register'), data).status_code, status.HTTP_201_CREATED)
+
+        data = {'username': 'newuser2', 'email': 'new2@example.com', 'password': 'newpassword2'}
+        response = self.client.post(reverse('usuario-register'), data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(Usuario.objects.filter(username='newuser2').exists())
+
+    @throttle_rates(tarea_write_user='2/min')
+    def test_tarea_writes_throttled_per_user(self):
+        """Test that tarea writes are throttled per user while reads are not"""
+        self.client.force_authenticate(user=self.user)
+        for _ in range(2):
+            response = self.client.post(reverse('tarea-create'), {'title': 'Throttled'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(reverse('tarea-create'), {'title': 'Throttled'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        # Check that reads still work
+        self.assertEqual(self.client.get(reverse('tarea-list')).status_code, status.HTTP_200_OK)
@@ -0,0 +1,116 @@
+"""
+Token-bucket throttles.
+
+Each bucket holds as many requests as the rate's number and refills evenly
+over its period, so ``'10/min'`` allows a burst of 10 and then one request
+every six seconds. The bucket is stored as a single integer, its theoretical
+arrival time in milliseconds (GCRA), which is advanced with an atomic
+``cache.incr`` so concurrent workers sharing a cache cannot overspend it.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` under
+``<view.throttle_scope>_<ident>``, e.g. ``login_ip``; a rate of ``None``
+disables that bucket.
+"""
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    ident_name = None
+
+    def __init__(self):
+        # The scope depends on the view, so the rate is resolved per request.
+        pass
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def get_ident_value(self, request):
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = f'{view.throttle_scope}_{self.ident_name}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = max(1, self.duration * 1000 // self.num_requests)
+        burst = interval * self.num_requests
+        now = int(self.timer() * 1000)
+        timeout = self.duration + 1
+
+        self.cache.add(self.key, now, timeout)
+        try:
+            arrival = self.cache.incr(self.key, interval)
+        except ValueError:
+            # Expired between add and incr.
+            arrival = None
+        if arrival is None or arrival < now + interval:
+            # The bucket was full (idle since its arrival time): restart it
+            # from now. A concurrent increment lost here only errs lenient.
+            arrival = now + interval
+            self.cache.set(self.key, arrival, timeout)
+
+        if arrival - now > burst:
+            self.cache.decr(self.key, interval)
+            self.wait_ms = arrival - now - burst
+            return False
+
+        self.cache.touch(self.key, timeout)
+        return True
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class IPThrottle(TokenBucketThrottle):
+    """
+    One bucket per client address, honouring ``NUM_PROXIES``.
+    """
+    ident_name = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """
+    One bucket per submitted username, whatever address it comes from.
+    """
+    ident_name = 'username'
+
+    def get_ident_value(self, request):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        # Hashed so arbitrary input is a valid key for every cache backend.
+        return hashlib.md5(username.lower().encode('utf-8')).hexdigest()
+
+
+class UserThrottle(TokenBucketThrottle):
+    """
+    One bucket per authenticated user.
+    """
+    ident_name = 'user'
+
+    def get_ident_value(self, request):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return request.user.pk
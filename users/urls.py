@@ -4,5 +4,6 @@ from .views import *
 urlpatterns = [
     path('register', UsuarioRegisterView.as_view(), name='usuario-register'),
     path('login', LoginView.as_view(), name='usuario-login'),
+    path('refresh', RefreshView.as_view(), name='usuario-refresh'),
     path('details', UserDetailsViews.as_view(), name='usuario-details')
 ]
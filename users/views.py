@@ -1,13 +1,20 @@
 from rest_framework import views, permissions, generics, response, status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from .cookies import REFRESH_COOKIE, set_auth_cookies
 from .serializers import UsuarioSerializers
+from .throttling import IPThrottle, UsernameThrottle
 from users.models import Usuario
 
 class UsuarioRegisterView(generics.CreateAPIView):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializers
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle, UsernameThrottle]
+    throttle_scope = 'register'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -23,6 +30,8 @@ class UsuarioRegisterView(generics.CreateAPIView):
 
 class LoginView(views.APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle, UsernameThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         username = request.data.get("username")
@@ -45,22 +54,7 @@ class LoginView(views.APIView):
                 {"message": "Login successful"}, 
                 status=status.HTTP_200_OK
             )
-            
-            resp.set_cookie(
-                "access_token_cookie",
-                value=access_token,
-                httponly=True,
-                samesite='Lax',
-                max_age=300
-            )
-            
-            resp.set_cookie(
-                "refresh_token",
-                value=refresh_token,
-                httponly=True,
-                samesite='Lax',
-                max_age=86400
-            )
+            set_auth_cookies(resp, access_token, refresh_token)
             
             return resp
         else:
@@ -69,9 +63,58 @@ class LoginView(views.APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+class RefreshView(views.APIView):
+    """
+    Issue a new access cookie from the refresh cookie, without a password
+    check. With ``ROTATE_REFRESH_TOKENS`` the refresh cookie is replaced too,
+    and the old token is blacklisted if ``BLACKLIST_AFTER_ROTATION`` is set.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        refresh_token = request.COOKIES.get(REFRESH_COOKIE)
+
+        if not refresh_token:
+            return response.Response(
+                {"error": "Refresh token not provided"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        serializer = TokenRefreshSerializer(data={"refresh": refresh_token})
+        # Without authentication classes DRF would answer 403 to auth errors,
+        # so failures are returned as explicit 401 responses.
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            error = e.args[0]
+        except AuthenticationFailed as e:
+            error = e.detail
+        except Usuario.DoesNotExist:
+            error = "User not found"
+        else:
+            error = None
+
+        if error:
+            return response.Response(
+                {"error": error},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        resp = response.Response(
+            {"message": "Token refreshed"},
+            status=status.HTTP_200_OK
+        )
+        set_auth_cookies(resp, serializer.validated_data["access"], serializer.validated_data.get("refresh"))
+        return resp
+
 class UserDetailsViews(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        serializer = UsuarioSerializers(request.user)
+        user = request.user
+        if user.get_deferred_fields():
+            # Served from users.cache, which keeps only a few fields
+            user = Usuario.objects.get(pk=user.pk)
+        serializer = UsuarioSerializers(user)
         return response.Response(serializer.data)
\ No newline at end of file